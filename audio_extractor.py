@@ -4,115 +4,431 @@ Advanced Audio Extraction Pipeline for Video Processing
 Optimized for transcription accuracy with noise reduction and format optimization
 """
 
-import ffmpeg
+import asyncio
+import atexit
+import concurrent.futures
+import functools
 import logging
 import os
 import platform
+import shlex
 import shutil
+import stat
+import struct
 import subprocess
+import sys
+import tempfile
+from collections import deque
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import Any, Literal, NamedTuple
 
 # Force UTF-8 encoding for subprocess operations on Windows
 if platform.system() == "Windows":
     os.environ.setdefault("PYTHONIOENCODING", "utf-8")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
+# Translation table turning Windows path separators into container ones
+_WIN_TRANS = str.maketrans({"\\": "/"})
+
+
+@functools.lru_cache(maxsize=256)
+def _to_mount_path(directory: Path) -> str:
+    """
+    Convert an absolute host directory to a container-compatible volume source.
+
+    Cached per directory, since batches typically share a handful of parents.
+    """
+    path_str = str(directory.absolute())
+    if platform.system() != "Windows":
+        return path_str
+
+    # Handle Windows drive letters properly
+    if len(path_str) >= 2 and path_str[1] == ":":
+        drive = path_str[0].lower()
+        remainder = path_str[2:].translate(_WIN_TRANS)
+        return f"/{drive}{remainder}"
+
+    # UNC and other paths only need their separators converted
+    return path_str.translate(_WIN_TRANS)
+
+
+@functools.lru_cache(maxsize=256)
+def _container_dir(directory: Path, workspace: Path, mount: str) -> str | None:
+    """
+    Map a host directory into a container mount of ``workspace`` at ``mount``.
+
+    Cached per directory like _to_mount_path, so files that share a parent
+    pay for the relative_to walk and POSIX formatting once.
+
+    Returns:
+        The container directory, or None if it lies outside the workspace
+    """
+    try:
+        relative = directory.relative_to(workspace)
+    except ValueError:
+        return None
+    if relative == Path():
+        return mount
+    return f"{mount}/{relative.as_posix()}"
+
+
+def _container_path(container_dir: str, name: str) -> str:
+    """Join a container directory from _container_dir with a file name."""
+    return f"{container_dir}/{name}"
+
+
+# Supported video formats
+_VIDEO_EXTS = frozenset(
+    {".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"}
+)
+# Supported audio output formats
+_AUDIO_EXTS = frozenset({".wav", ".mp3", ".flac", ".m4a", ".ogg"})
+
+# Lower-cases a file suffix; batches repeat the same few extensions
+_norm_ext = functools.lru_cache(maxsize=64)(str.lower)
+
+# Quiet FFmpeg down to errors and have it report machine-readable progress on
+# stderr instead of a per-frame status line
+_FFMPEG_LOG_ARGS = ["-nostats", "-loglevel", "error", "-progress", "pipe:2"]
+
+# Number of trailing FFmpeg error lines kept for failure reports
+_MAX_ERROR_LINES = 50
+
+# Raw float32 sample format matching this machine's byte order, so the
+# decoded buffer can be viewed as floats without swapping
+_F32_FORMAT = "f32le" if sys.byteorder == "little" else "f32be"
+
+# Runs FFmpeg exec'd into the long-lived container after recording its PID in
+# the file given as $0, since exec doesn't forward signals to it
+_PID_FILE_WRAPPER = 'echo $$ > "$0" && exec ffmpeg "$@"'
+
+# Output formats FFmpeg can write to a non-seekable pipe, mapped to their muxer
+# (.m4a is excluded: the MP4 muxer must seek back to write its index)
+_PIPE_MUXERS = {".wav": "wav", ".mp3": "mp3", ".flac": "flac", ".ogg": "ogg"}
+
+
+def _finalize_wav_header(path: Path) -> None:
+    """
+    Fill in the RIFF and data chunk sizes of a WAV file that FFmpeg streamed
+    to a pipe, where it could not seek back to write them.
+    """
+    with open(path, "r+b") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return
+        file_size = f.seek(0, os.SEEK_END)
+        f.seek(4)
+        f.write(struct.pack("<I", min(file_size - 8, 0xFFFFFFFF)))
+
+        offset = 12
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+            if chunk_id == b"data":
+                f.seek(offset + 4)
+                f.write(struct.pack("<I", min(file_size - offset - 8, 0xFFFFFFFF)))
+                break
+            offset += 8 + chunk_size + (chunk_size & 1)
+
+
+class _FFmpegCall(NamedTuple):
+    """An FFmpeg command prefix built by AudioExtractor._ffmpeg_prefix."""
+
+    # Command to which FFmpeg's own options are appended
+    argv: list[str]
+    # Host path -> the path FFmpeg sees for it
+    paths: dict[Path, str]
+    # Host directory of an exec'd job in the container's scratch mount
+    job_dir: Path | None = None
+    # Output path -> host path FFmpeg writes it to inside job_dir
+    staged: dict[Path, Path] | None = None
+
+
+def _publish_staged(call: _FFmpegCall) -> None:
+    """Move the outputs of a successful exec'd job from scratch into place."""
+    if call.staged is None:
+        return
+    for output, staged in call.staged.items():
+        try:
+            os.replace(staged, output)
+        except FileNotFoundError:
+            continue  # Not written; reported when the outputs are checked
+        except OSError:  # e.g. scratch is on another file system
+            shutil.copyfile(staged, output)
+
+
+def _discard_job(call: _FFmpegCall) -> None:
+    """Remove an exec'd job's scratch directory and whatever is left in it."""
+    if call.job_dir is not None:
+        shutil.rmtree(call.job_dir, ignore_errors=True)
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    asyncio.run refuses to start inside a thread whose event loop is already
+    running (a notebook, an async application), so there the coroutine runs
+    on a fresh loop in a worker thread while the caller blocks, as it would
+    on a plain subprocess call.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+@functools.cache
+def _find_container_runtime() -> str:
+    """Find an installed container runtime (looked up once per process)."""
+    for rt in ["podman", "docker"]:
+        if shutil.which(rt) is not None:
+            logger.info("Detected container runtime: %s", rt)
+            return rt
+
+    logger.warning("No container runtime detected")
+    return "podman"  # Default fallback
+
+
+def resolve_ffmpeg_mode(
+    container_engine: bool | Literal["auto"], container_runtime: str = "auto"
+) -> tuple[bool, str]:
+    """
+    Resolve "auto" settings to the FFmpeg mode an AudioExtractor would use.
+
+    Returns:
+        Tuple of (whether FFmpeg runs in a container, container runtime)
+    """
+    if container_engine == "auto":
+        container_engine = shutil.which("ffmpeg") is None
+    if container_runtime == "auto":
+        container_runtime = _find_container_runtime()
+    return container_engine, container_runtime
+
+
 class AudioExtractor:
     """
     Advanced audio extraction pipeline using FFmpeg with container support.
     Optimized for transcription accuracy with noise reduction and format optimization.
     """
 
-    # Supported video formats
-    SUPPORTED_VIDEO_FORMATS = {
-        ".mp4",
-        ".avi",
-        ".mkv",
-        ".mov",
-        ".wmv",
-        ".flv",
-        ".webm",
-        ".m4v",
-    }
-    # Supported audio output formats
-    SUPPORTED_AUDIO_FORMATS = {".wav", ".mp3", ".flac", ".m4a", ".ogg"}
+    SUPPORTED_VIDEO_FORMATS = _VIDEO_EXTS
+    SUPPORTED_AUDIO_FORMATS = _AUDIO_EXTS
+
+    # (container_engine, container_runtime, container_image) combinations whose
+    # FFmpeg has already been verified in this process
+    _verified_configs: set[tuple[bool, str, str]] = set()
 
     def __init__(
         self,
-        container_engine: bool = True,
+        container_engine: bool | Literal["auto"] = "auto",
         container_runtime: str = "auto",  # auto, podman, docker
         container_image: str = "linuxserver/ffmpeg:latest",
         timeout: int = 600,  # 10 minutes default timeout
+        workspace_dir: str | None = None,
     ) -> None:
         """
         Initialize the AudioExtractor with optimal settings for transcription.
 
         Args:
-            container_engine: Whether to use container-based FFmpeg
+            container_engine: Whether to use container-based FFmpeg; "auto" uses
+                a local FFmpeg when one is on PATH and a container otherwise
             container_runtime: Container runtime to use (auto, podman, docker)
             container_image: Container image to use for FFmpeg
             timeout: Timeout in seconds for audio extraction operations
+            workspace_dir: Host directory bind-mounted read-only into the
+                long-lived FFmpeg container (defaults to the current working
+                directory); files outside it get a one-off container with
+                their own mounts. A filesystem root is only mounted when
+                given explicitly: as the default, no long-lived container
+                is started
 
         Raises:
             RuntimeError: If FFmpeg is not available
         """
+        if container_engine == "auto":
+            container_engine, _ = resolve_ffmpeg_mode(container_engine)
+            logger.info(
+                "Using %s FFmpeg", "container-based" if container_engine else "local"
+            )
         self.container_engine = container_engine
         self.container_runtime = self._detect_container_runtime(container_runtime)
         self.container_image = container_image
         self.timeout = timeout
+        self.workspace_dir = Path(workspace_dir or Path.cwd()).resolve()
+        self._container_id: str | None = None
+        self._scratch_dir: Path | None = None
 
         # Optimal settings for transcription accuracy
         self.target_sample_rate = 16000  # 16kHz - optimal for most speech recognition
         self.target_channels = 1  # Mono - reduces file size and complexity
 
-        # Verify FFmpeg availability
-        self._verify_ffmpeg()
+        # Start the long-lived container jobs are exec'd into, then verify FFmpeg.
+        # A server started from / must not expose the whole host by default
+        if self.container_engine:
+            if (
+                workspace_dir is None
+                and self.workspace_dir.parent == self.workspace_dir
+            ):
+                logger.warning(
+                    "Working directory %s is a filesystem root; not mounting it "
+                    "as the FFmpeg workspace (pass workspace_dir to do so). Each "
+                    "extraction uses a one-off container",
+                    self.workspace_dir,
+                )
+            else:
+                self._start_container()
+        try:
+            self._verify_ffmpeg()
+        except RuntimeError:
+            self.close()
+            raise
+
+    def __enter__(self) -> "AudioExtractor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_container(self) -> None:
+        """
+        Start a detached FFmpeg container with the workspace bind-mounted once,
+        read-only, at /work.
+
+        Each extraction then runs via ``exec`` inside this container instead of
+        paying the container start-up cost with a fresh ``run --rm``. The
+        only host directory the container can write to is a private scratch
+        directory mounted at /scratch: exec'd jobs stream single outputs on
+        stdout, and jobs that write files (batches, M4A) write them there to
+        be moved into place afterwards.
+        """
+        # The container may run as another (remapped) user: it needs to reach
+        # its job directories, which are created world-writable
+        self._scratch_dir = Path(tempfile.mkdtemp(prefix="audio-extractor-"))
+        os.chmod(self._scratch_dir, 0o711)
+        cmd = [
+            self.container_runtime,
+            "run",
+            "-d",
+            "--rm",
+            "-v",
+            f"{_to_mount_path(self.workspace_dir)}:/work:ro",
+            "-v",
+            f"{_to_mount_path(self._scratch_dir)}:/scratch",
+            "--entrypoint",
+            "sleep",
+            self.container_image,
+            "infinity",
+        ]
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            self._remove_scratch_dir()
+            raise RuntimeError(
+                f"{self.container_runtime.title()} FFmpeg container start timed out"
+            )
+        except FileNotFoundError:
+            self._remove_scratch_dir()
+            raise RuntimeError(
+                f"{self.container_runtime.title()} not found. Please install {self.container_runtime} or set container_engine=False"
+            )
+        if result.returncode != 0:
+            self._remove_scratch_dir()
+            raise RuntimeError(
+                f"{self.container_runtime.title()} FFmpeg container failed to start: {result.stderr.decode('utf-8', 'replace')}"
+            )
+
+        self._container_id = result.stdout.decode().strip()
+        atexit.register(self.close)
+        logger.info(
+            "Started %s FFmpeg container %s",
+            self.container_runtime,
+            self._container_id[:12],
+        )
+
+    def _remove_scratch_dir(self) -> None:
+        """Remove the container's scratch directory, if one was created."""
+        if self._scratch_dir is not None:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+            self._scratch_dir = None
+
+    def close(self) -> None:
+        """Remove the long-lived FFmpeg container, if one is running."""
+        if self._container_id is None:
+            return
+
+        container_id, self._container_id = self._container_id, None
+        atexit.unregister(self.close)
+        try:
+            subprocess.run(
+                [self.container_runtime, "rm", "-f", container_id],
+                capture_output=True,
+                timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(
+                "Failed to remove FFmpeg container %s: %s", container_id[:12], e
+            )
+        self._remove_scratch_dir()
 
     def _detect_container_runtime(self, runtime: str) -> str:
         """Detect available container runtime."""
         if runtime != "auto":
             return runtime
 
-        # Check for available container runtimes
-        for rt in ["podman", "docker"]:
-            if shutil.which(rt) is not None:
-                logger.info(f"Detected container runtime: {rt}")
-                return rt
-
-        logger.warning("No container runtime detected")
-        return "podman"  # Default fallback
+        return _find_container_runtime()
 
     def _verify_ffmpeg(self) -> None:
-        """Verify FFmpeg is available (locally or via container)."""
+        """
+        Verify FFmpeg is available (locally or via container).
+
+        Verification is skipped for configurations already verified by an
+        earlier instance, since the outcome doesn't change on a stable host.
+        """
+        config = (self.container_engine, self.container_runtime, self.container_image)
+        if config in AudioExtractor._verified_configs:
+            return
+
         if self.container_engine:
+            if self._container_id:
+                cmd = [
+                    self.container_runtime,
+                    "exec",
+                    self._container_id,
+                    "ffmpeg",
+                    "-version",
+                ]
+            else:
+                # No long-lived container; the image's entrypoint is FFmpeg
+                cmd = [
+                    self.container_runtime,
+                    "run",
+                    "--rm",
+                    self.container_image,
+                    "-version",
+                ]
             try:
                 result = subprocess.run(
-                    [
-                        self.container_runtime,
-                        "run",
-                        "--rm",
-                        self.container_image,
-                        "ffmpeg",
-                        "-version",
-                    ],
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
                     timeout=30,
                 )
                 if result.returncode != 0:
                     raise RuntimeError(
-                        f"{self.container_runtime.title()} FFmpeg not available: {result.stderr}"
+                        f"{self.container_runtime.title()} FFmpeg not available: {result.stderr.decode('utf-8', 'replace')}"
                     )
                 logger.info(
-                    f"{self.container_runtime.title()} FFmpeg verified successfully"
+                    "%s FFmpeg verified successfully", self.container_runtime.title()
                 )
             except subprocess.TimeoutExpired:
                 raise RuntimeError(
@@ -126,10 +442,8 @@ class AudioExtractor:
             try:
                 result = subprocess.run(
                     ["ffmpeg", "-version"],
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
                     timeout=10,
                 )
                 if result.returncode != 0:
@@ -140,46 +454,85 @@ class AudioExtractor:
                     "FFmpeg not found in PATH. Please install FFmpeg or use container mode."
                 )
 
-    def _validate_paths(self, input_path: str, output_path: str) -> tuple[Path, Path]:
+        AudioExtractor._verified_configs.add(config)
+
+    def _validate_input(
+        self, input_path: str, input_stat: os.stat_result | None = None
+    ) -> Path:
         """
-        Validate input and output paths.
+        Validate an input path.
+
+        The input is stat'ed once (or not at all when the caller already has
+        its stat result) and that result answers the existence, type and size
+        checks.
 
         Args:
             input_path: Path to input video file
-            output_path: Path to output audio file
+            input_stat: The input's stat result, if the caller already has it
 
         Returns:
-            Tuple of validated input and output Path objects
+            The validated input Path object
 
         Raises:
             FileNotFoundError: If input file doesn't exist
-            ValueError: If paths are invalid or formats unsupported
+            ValueError: If the input is not a regular file
         """
         input_file = Path(input_path).resolve()
-        output_file = Path(output_path).resolve()
 
-        if not input_file.exists():
-            raise FileNotFoundError(f"Input file not found: {input_path}")
+        if input_stat is None:
+            try:
+                input_stat = os.stat(input_file)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Input file not found: {input_path}")
 
-        if not input_file.is_file():
+        if not stat.S_ISREG(input_stat.st_mode):
             raise ValueError(f"Input path is not a file: {input_path}")
 
         # Check file size (warn for very large files)
-        file_size_mb = input_file.stat().st_size / (1024 * 1024)
+        file_size_mb = input_stat.st_size / (1024 * 1024)
         if file_size_mb > 1000:  # Warn for files > 1GB
             logger.warning(
-                f"Large input file detected ({file_size_mb:.1f}MB). Processing may take a while."
+                "Large input file detected (%.1fMB). Processing may take a while.",
+                file_size_mb,
             )
 
-        # Validate input file format
-        if input_file.suffix.lower() not in self.SUPPORTED_VIDEO_FORMATS:
+        # Validate input file format; audio files decode just as well
+        input_ext = _norm_ext(input_file.suffix)
+        if input_ext not in _VIDEO_EXTS and input_ext not in _AUDIO_EXTS:
             logger.warning(
-                f"Input format {input_file.suffix} may not be supported. "
-                f"Supported formats: {', '.join(self.SUPPORTED_VIDEO_FORMATS)}"
+                "Input format %s may not be supported. Supported formats: %s",
+                input_file.suffix,
+                ", ".join(self.SUPPORTED_VIDEO_FORMATS),
             )
 
+        return input_file
+
+    def _validate_paths(
+        self,
+        input_path: str,
+        output_path: str,
+        input_stat: os.stat_result | None = None,
+    ) -> tuple[Path, Path]:
+        """
+        Validate input and output paths.
+
+        Args:
+            input_path: Path to input video file
+            output_path: Path to output audio file
+            input_stat: The input's stat result, if the caller already has it
+
+        Returns:
+            Tuple of validated input and output Path objects
+
+        Raises:
+            FileNotFoundError: If input file doesn't exist
+            ValueError: If paths are invalid or formats unsupported
+        """
+        input_file = self._validate_input(input_path, input_stat)
+        output_file = Path(output_path).resolve()
+
         # Validate output file format
-        if output_file.suffix.lower() not in self.SUPPORTED_AUDIO_FORMATS:
+        if _norm_ext(output_file.suffix) not in _AUDIO_EXTS:
             raise ValueError(
                 f"Output format {output_file.suffix} not supported. "
                 f"Supported formats: {', '.join(self.SUPPORTED_AUDIO_FORMATS)}"
@@ -190,166 +543,622 @@ class AudioExtractor:
 
         return input_file, output_file
 
-    def _get_container_paths(
-        self, input_file: Path, output_file: Path
-    ) -> tuple[str, str, str, str]:
+    def _workspace_path(self, path: Path) -> str | None:
         """
-        Get container-compatible paths for volume mounting.
+        Map a host path into the long-lived container's ``/work`` mount.
+
+        Returns:
+            The container path, or None if the path lies outside the workspace
+        """
+        container_dir = _container_dir(path.parent, self.workspace_dir, "/work")
+        if container_dir is None:
+            return None
+        return _container_path(container_dir, path.name)
+
+    def _ffmpeg_prefix(
+        self, inputs: list[Path], outputs: list[Path] | None = None
+    ) -> _FFmpegCall:
+        """
+        Build the command prefix that invokes FFmpeg and map host paths for it.
+
+        Commands whose inputs lie in the workspace run in the long-lived
+        container. Its workspace mount is read-only, so their output files are
+        written to a job directory in its scratch mount; callers move them
+        into place with _publish_staged and clean up with _discard_job.
+        Commands reading files outside the workspace get a one-off container.
 
         Args:
-            input_file: Input file path
-            output_file: Output file path
+            inputs: Input paths the command will read
+            outputs: Output paths the command will write
 
         Returns:
-            Tuple of (input_mount, output_mount, input_container_path, output_container_path)
+            The command prefix and the paths FFmpeg sees
         """
-        if platform.system() == "Windows":
-            # Improved Windows path handling
-            def convert_windows_path(path: Path) -> str:
-                """Convert Windows path to container-compatible format."""
-                path_str = str(path.parent.absolute())
+        outputs = outputs or []
+        files = inputs + outputs
+        if not self.container_engine:
+            return _FFmpegCall(["ffmpeg"], {f: str(f) for f in files})
 
-                # Handle Windows drive letters properly
-                if len(path_str) >= 2 and path_str[1] == ":":
-                    drive = path_str[0].lower()
-                    remainder = path_str[2:].replace("\\", "/")
-                    return f"/{drive}{remainder}"
+        if self._container_id:
+            workspace_paths = {f: self._workspace_path(f) for f in inputs}
+            if all(workspace_paths.values()):
+                job_dir = Path(tempfile.mkdtemp(dir=self._scratch_dir))
+                os.chmod(job_dir, 0o777)
+                staged = {}
+                for index, output in enumerate(outputs):
+                    name = f"{index}{output.suffix}"
+                    staged[output] = job_dir / name
+                    workspace_paths[output] = f"/scratch/{job_dir.name}/{name}"
+                prefix = [
+                    self.container_runtime,
+                    "exec",
+                    self._container_id,
+                    "sh",
+                    "-c",
+                    _PID_FILE_WRAPPER,
+                    f"/scratch/{job_dir.name}/ffmpeg.pid",
+                ]
+                return _FFmpegCall(prefix, workspace_paths, job_dir, staged)
 
-                # Handle UNC paths
-                if path_str.startswith("\\\\"):
-                    return path_str.replace("\\", "/")
+        # Mount each distinct directory once in a one-off container; only
+        # directories that receive output are writable
+        mounts: dict[Path, str] = {}
+        for f in files:
+            mounts.setdefault(f.parent, f"/mnt/{len(mounts)}")
+        writable = {f.parent for f in outputs}
+        prefix = [self.container_runtime, "run", "--rm"]
+        for directory, target in mounts.items():
+            mode = "" if directory in writable else ":ro"
+            prefix += ["-v", f"{_to_mount_path(directory)}:{target}{mode}"]
+        prefix.append(self.container_image)
+        return _FFmpegCall(
+            prefix, {f: _container_path(mounts[f.parent], f.name) for f in files}
+        )
 
-                return path_str.replace("\\", "/")
+    def _audio_output_args(
+        self, input_index: int, codec: str = "pcm_s16le"
+    ) -> list[str]:
+        """
+        FFmpeg output options that take the first audio stream of an input and
+        encode it for transcription (16-bit PCM unless another codec is given).
 
-            input_dir = convert_windows_path(input_file)
-            output_dir = convert_windows_path(output_file)
-        else:
-            input_dir = str(input_file.parent.absolute())
-            output_dir = str(output_file.parent.absolute())
-
-        return (
-            input_dir,
-            output_dir,
-            f"/input/{input_file.name}",
-            f"/output/{output_file.name}",
+        Video, subtitle and data streams are disabled so FFmpeg doesn't decode
+        or carry them; PCM encoding gains nothing from more than a couple of
+        threads.
+        """
+        return [
+            "-map",
+            f"{input_index}:a:0",
+            "-vn",
+            "-sn",
+            "-dn",
+            "-acodec",
+            codec,
+            "-ac",
+            str(self.target_channels),  # Mono (1 channel)
+            "-ar",
+            str(self.target_sample_rate),  # 16kHz sample rate
+            "-threads",
+            "2",
+        ]
+
+    def _single_command(
+        self, input_file: Path, output_file: Path
+    ) -> tuple[_FFmpegCall, bool]:
+        """
+        Build the FFmpeg command for a single extraction.
+
+        In container mode, streamable output formats are written to stdout so
+        the output needn't be staged or bind-mounted.
+
+        Args:
+            input_file: Input file path
+            output_file: Output file path
+
+        Returns:
+            Tuple of (the call, whose argv is the full command, and whether
+            the output is streamed on stdout)
+        """
+        muxer = None
+        if self.container_engine:
+            muxer = _PIPE_MUXERS.get(_norm_ext(output_file.suffix))
+        call = self._ffmpeg_prefix([input_file], [] if muxer else [output_file])
+        call.argv.extend(
+            [
+                *_FFMPEG_LOG_ARGS,
+                "-y",  # Overwrite output file
+                "-i",
+                call.paths[input_file],
+                *self._audio_output_args(0),
+            ]
+        )
+        call.argv.extend(
+            ["-f", muxer, "pipe:1"] if muxer else [call.paths[output_file]]
         )
+        return call, muxer is not None
 
-    def extract_basic_audio(self, input_path: str, output_path: str) -> bool:
+    def extract_basic_audio(
+        self, input_path: str, output_path: str, timeout: float | None = None
+    ) -> bool:
         """
         Extract audio with basic settings matching:
         ffmpeg -i input.mp4 -acodec pcm_s16le -ac 1 -ar 16000 output.wav
 
+        Blocking wrapper around extract_basic_audio_async; call that directly
+        from code already running in an event loop.
+
         Args:
             input_path: Path to input video file
             output_path: Path to output audio file
+            timeout: Timeout in seconds (defaults to the extractor's timeout)
 
         Returns:
             True if extraction successful, False otherwise
         """
+        return _run_sync(
+            self.extract_basic_audio_async(input_path, output_path, timeout)
+        )
+
+    async def _stop_container_ffmpeg(self, job_dir: Path) -> None:
+        """
+        Stop an FFmpeg exec'd into the long-lived container.
+
+        Neither ``docker exec`` nor ``podman exec`` forwards signals, so
+        terminating the exec client would leave FFmpeg running in the
+        container; it is killed there by the PID it recorded instead.
+        """
+        try:
+            pid = (job_dir / "ffmpeg.pid").read_text().strip()
+        except OSError:
+            return  # FFmpeg hasn't started
+        if not pid.isdigit() or self._container_id is None:
+            return
         try:
-            logger.info(f"Starting basic audio extraction from {input_path}")
+            proc = await asyncio.create_subprocess_exec(
+                self.container_runtime,
+                "exec",
+                self._container_id,
+                "kill",
+                pid,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await asyncio.wait_for(proc.wait(), 10)
+        except (OSError, TimeoutError) as e:
+            logger.warning("Failed to stop FFmpeg in container: %s", e)
+
+    async def _run_ffmpeg_async(
+        self,
+        cmd: list[str],
+        timeout: float,
+        stdout: int | bytearray | None = None,
+        job_dir: Path | None = None,
+    ) -> tuple[int, str]:
+        """
+        Run an FFmpeg command with asyncio, parsing its progress as it streams.
 
-            # Validate paths
-            input_file, output_file = self._validate_paths(input_path, output_path)
+        FFmpeg reports progress as key=value lines on stderr (-progress pipe:2);
+        those are logged at DEBUG and only the last few error lines are kept,
+        so memory stays bounded however long the input is. FFmpeg is terminated
+        if the timeout expires or the awaiting task is cancelled. Its stdout
+        goes to ``stdout`` when given (a file descriptor, or a bytearray the
+        output is appended to), else is discarded. ``job_dir`` is the job
+        directory of a command exec'd into the long-lived container, whose
+        FFmpeg must be stopped inside the container.
 
-            if not self.container_engine:
-                # Local FFmpeg version
-                try:
-                    stream = ffmpeg.input(str(input_file))
-                    output = ffmpeg.output(
-                        stream,
-                        str(output_file),
-                        acodec="pcm_s16le",  # 16-bit PCM
-                        ac=self.target_channels,  # Mono (1 channel)
-                        ar=self.target_sample_rate,  # 16kHz sample rate
-                        loglevel="info",  # Show progress
+        Returns:
+            Tuple of (return code, FFmpeg error output)
+
+        Raises:
+            TimeoutError: If the command did not finish within the timeout
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running command: %s", shlex.join(cmd))
+        if stdout is None:
+            stdout_target = asyncio.subprocess.DEVNULL
+        elif isinstance(stdout, bytearray):
+            stdout_target = asyncio.subprocess.PIPE
+        else:
+            stdout_target = stdout
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=stdout_target, stderr=asyncio.subprocess.PIPE
+        )
+        errors: deque[str] = deque(maxlen=_MAX_ERROR_LINES)
+        drains = [proc.wait()]
+
+        async def drain_stdout(buffer: bytearray) -> None:
+            while chunk := await proc.stdout.read(1 << 20):
+                buffer += chunk
+
+        if isinstance(stdout, bytearray):
+            drains.append(drain_stdout(stdout))
+
+        async def drain_stderr() -> None:
+            progress: dict[str, str] = {}
+            async for raw_line in proc.stderr:
+                line = raw_line.decode("utf-8", errors="replace").rstrip()
+                key, sep, value = line.partition("=")
+                if not (sep and key.isidentifier()):
+                    if line:
+                        errors.append(line)
+                    continue
+                progress[key] = value
+                if key == "progress":
+                    logger.debug(
+                        "FFmpeg progress: out_time=%s speed=%s (%s)",
+                        progress.get("out_time"),
+                        progress.get("speed"),
+                        value,
                     )
-                    ffmpeg.run(output, overwrite_output=True, quiet=False)
-                except ffmpeg.Error as e:
-                    stderr_msg = ""
-                    if e.stderr:
-                        try:
-                            stderr_msg = e.stderr.decode("utf-8", errors="replace")
-                        except (UnicodeDecodeError, AttributeError):
-                            stderr_msg = str(e.stderr)
-                    logger.error(f"FFmpeg error: {stderr_msg or str(e)}")
-                    return False
 
-            else:
-                # Container FFmpeg version with improved path handling
-                input_mount, output_mount, input_container, output_container = (
-                    self._get_container_paths(input_file, output_file)
-                )
+        try:
+            await asyncio.wait_for(asyncio.gather(drain_stderr(), *drains), timeout)
+        except BaseException:
+            # Timed out or cancelled: stop FFmpeg (inside the container for
+            # exec'd jobs, since the exec client doesn't forward signals),
+            # then stop and reap the local process
+            if proc.returncode is None:
+                if job_dir is not None:
+                    await self._stop_container_ffmpeg(job_dir)
+                proc.terminate()
+                try:
+                    await asyncio.wait_for(proc.wait(), 5)
+                except TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+            raise
+        return proc.returncode, "\n".join(errors)
 
-                cmd = [
-                    self.container_runtime,
-                    "run",
-                    "--rm",
-                    "-v",
-                    f"{input_mount}:/input:ro",  # Read-only input mount
-                    "-v",
-                    f"{output_mount}:/output",
-                    self.container_image,
-                    "-i",
-                    input_container,
-                    "-acodec",
-                    "pcm_s16le",
-                    "-ac",
-                    str(self.target_channels),
-                    "-ar",
-                    str(self.target_sample_rate),
-                    "-loglevel",
-                    "info",  # Show progress
-                    "-y",  # Overwrite output file
-                    output_container,
-                ]
+    async def extract_basic_audio_async(
+        self,
+        input_path: str,
+        output_path: str,
+        timeout: float | None = None,
+        input_stat: os.stat_result | None = None,
+    ) -> bool:
+        """
+        Asynchronous variant of extract_basic_audio.
 
-                logger.debug(f"Running command: {' '.join(cmd)}")
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
-                    timeout=self.timeout,
-                )
-                if result.returncode != 0:
-                    logger.error(
-                        f"{self.container_runtime.title()} FFmpeg failed: {result.stderr}"
+        FFmpeg runs as an asyncio subprocess, so no executor thread is held per
+        job and cancelling the awaiting task stops the extraction.
+
+        Args:
+            input_path: Path to input video file
+            output_path: Path to output audio file
+            timeout: Timeout in seconds (defaults to the extractor's timeout)
+            input_stat: The input's stat result, if the caller already has it
+
+        Returns:
+            True if extraction successful, False otherwise
+        """
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            logger.info("Starting basic audio extraction from %s", input_path)
+
+            input_file, output_file = self._validate_paths(
+                input_path, output_path, input_stat
+            )
+
+            # Build the argv directly; local and container mode differ only in prefix
+            call, streamed = self._single_command(input_file, output_file)
+            # The raw fd becomes FFmpeg's stdout, so the kernel writes the
+            # stream straight into the file with no copy loop in between
+            stdout_fd = None
+            try:
+                if streamed:
+                    stdout_fd = os.open(
+                        output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
                     )
-                    return False
+                returncode, stderr = await self._run_ffmpeg_async(
+                    call.argv, timeout, stdout=stdout_fd, job_dir=call.job_dir
+                )
+                if returncode == 0:
+                    _publish_staged(call)
+            finally:
+                if stdout_fd is not None:
+                    os.close(stdout_fd)
+                _discard_job(call)
+            if returncode != 0:
+                logger.error("FFmpeg failed: %s", stderr)
+                return False
+            if streamed and _norm_ext(output_file.suffix) == ".wav":
+                _finalize_wav_header(output_file)
 
             # Verify output file was created and has content
-            if not output_file.exists():
+            try:
+                output_size = output_file.stat().st_size
+            except FileNotFoundError:
                 logger.error("Output file was not created")
                 return False
 
-            if output_file.stat().st_size == 0:
+            if output_size == 0:
                 logger.error("Output file is empty")
                 return False
 
-            logger.info(f"Basic audio extraction completed: {output_path}")
+            logger.info("Basic audio extraction completed: %s", output_path)
             return True
 
         except FileNotFoundError as e:
-            logger.error(f"File not found: {e}")
+            logger.error("File not found: %s", e)
             return False
         except ValueError as e:
-            logger.error(f"Invalid input: {e}")
+            logger.error("Invalid input: %s", e)
             return False
-        except RuntimeError as e:
-            logger.error(f"Runtime error: {e}")
-            return False
-        except subprocess.TimeoutExpired:
-            logger.error(f"Audio extraction timed out after {self.timeout} seconds")
+        except TimeoutError:
+            logger.error("Audio extraction timed out after %s seconds", timeout)
             return False
         except PermissionError as e:
-            logger.error(f"Permission denied: {e}")
+            logger.error("Permission denied: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Basic audio extraction failed: {e}")
+            logger.error("Basic audio extraction failed: %s", e)
             return False
 
+    async def _decode_to_memory_async(
+        self, input_path: str, sample_format: str
+    ) -> bytearray | None:
+        """
+        Decode a video's audio to raw 16kHz mono samples held in memory.
+
+        Args:
+            input_path: Path to input video file
+            sample_format: FFmpeg raw sample format, e.g. "s16le" or "f32le"
+
+        Returns:
+            The raw samples, or None if extraction failed
+        """
+        try:
+            logger.info(
+                "Starting %s audio extraction from %s", sample_format, input_path
+            )
+
+            input_file = self._validate_input(input_path)
+            call = self._ffmpeg_prefix([input_file])
+            cmd = [
+                *call.argv,
+                *_FFMPEG_LOG_ARGS,
+                "-i",
+                call.paths[input_file],
+                *self._audio_output_args(0, codec=f"pcm_{sample_format}"),
+                "-f",
+                sample_format,
+                "pipe:1",
+            ]
+
+            samples = bytearray()
+            try:
+                returncode, stderr = await self._run_ffmpeg_async(
+                    cmd, self.timeout, stdout=samples, job_dir=call.job_dir
+                )
+            finally:
+                _discard_job(call)
+            if returncode != 0:
+                logger.error("FFmpeg failed: %s", stderr)
+                return None
+            if not samples:
+                logger.error("No audio samples were decoded")
+                return None
+
+            logger.info(
+                "%s audio extraction completed: %d bytes", sample_format, len(samples)
+            )
+            return samples
+
+        except FileNotFoundError as e:
+            logger.error("File not found: %s", e)
+            return None
+        except ValueError as e:
+            logger.error("Invalid input: %s", e)
+            return None
+        except TimeoutError:
+            logger.error("Audio extraction timed out after %s seconds", self.timeout)
+            return None
+        except Exception as e:
+            logger.error("%s audio extraction failed: %s", sample_format, e)
+            return None
+
+    def extract_f32_mono_16k(self, input_path: str) -> memoryview | None:
+        """
+        Decode a video's audio straight into memory as 16kHz mono float32.
+
+        Blocking wrapper around extract_f32_mono_16k_async.
+
+        Args:
+            input_path: Path to input video file
+
+        Returns:
+            Samples as a float32 memoryview, or None if extraction failed
+        """
+        return _run_sync(self.extract_f32_mono_16k_async(input_path))
+
+    async def extract_f32_mono_16k_async(self, input_path: str) -> memoryview | None:
+        """
+        Asynchronous variant of extract_f32_mono_16k.
+
+        FFmpeg writes raw native-endian float32 samples to its stdout, which is
+        the layout Whisper-style models consume, so no WAV file is written,
+        re-read, parsed or converted from 16-bit PCM.
+
+        Args:
+            input_path: Path to input video file
+
+        Returns:
+            Samples as a float32 memoryview, or None if extraction failed
+        """
+        samples = await self._decode_to_memory_async(input_path, _F32_FORMAT)
+        return None if samples is None else memoryview(samples).cast("f")
+
+    def extract_s16_mono_16k(self, input_path: str) -> bytearray | None:
+        """
+        Decode a video's audio into memory as 16kHz mono 16-bit little-endian PCM.
+
+        Blocking wrapper around extract_s16_mono_16k_async.
+
+        Args:
+            input_path: Path to input video file
+
+        Returns:
+            Raw PCM samples (the payload of a WAV data chunk), or None if
+            extraction failed
+        """
+        return _run_sync(self.extract_s16_mono_16k_async(input_path))
+
+    async def extract_s16_mono_16k_async(self, input_path: str) -> bytearray | None:
+        """
+        Asynchronous variant of extract_s16_mono_16k.
+
+        Produces the same samples as extract_basic_audio without a file, for
+        callers that slice or upload the audio themselves.
+
+        Args:
+            input_path: Path to input video file
+
+        Returns:
+            Raw PCM samples, or None if extraction failed
+        """
+        return await self._decode_to_memory_async(input_path, "s16le")
+
+    def _prepare_batch(
+        self, pairs: list[tuple[str, str]]
+    ) -> tuple[list[bool], list[tuple[int, Path, Path]], _FFmpegCall | None]:
+        """
+        Validate a batch and build the single FFmpeg command that converts it.
+
+        Args:
+            pairs: (input_path, output_path) tuples
+
+        Returns:
+            Tuple of (per-pair results initialised to False, valid jobs as
+            (index, input_file, output_file), the call whose argv is the
+            FFmpeg command, or None if no pair is valid)
+        """
+        results = [False] * len(pairs)
+        jobs: list[tuple[int, Path, Path]] = []
+        for index, (input_path, output_path) in enumerate(pairs):
+            try:
+                input_file, output_file = self._validate_paths(input_path, output_path)
+            except (FileNotFoundError, ValueError, PermissionError) as e:
+                logger.error("Skipping %s: %s", input_path, e)
+                continue
+            jobs.append((index, input_file, output_file))
+
+        if not jobs:
+            return results, jobs, None
+
+        call = self._ffmpeg_prefix(
+            [input_file for _, input_file, _ in jobs],
+            [output_file for _, _, output_file in jobs],
+        )
+        cmd, paths = call.argv, call.paths
+        cmd += [*_FFMPEG_LOG_ARGS, "-y"]
+        for _, input_file, _ in jobs:
+            cmd += ["-i", paths[input_file]]
+        for input_index, (_, _, output_file) in enumerate(jobs):
+            cmd += [*self._audio_output_args(input_index), paths[output_file]]
+        return results, jobs, call
+
+    def _collect_batch(
+        self, results: list[bool], jobs: list[tuple[int, Path, Path]]
+    ) -> list[bool]:
+        """Verify each output file of a finished batch was created and has content."""
+        for index, _, output_file in jobs:
+            try:
+                results[index] = output_file.stat().st_size > 0
+            except FileNotFoundError:
+                results[index] = False
+            if not results[index]:
+                logger.error("Output file missing or empty: %s", output_file)
+
+        logger.info(
+            "Batch audio extraction completed: %d/%d succeeded",
+            sum(results),
+            len(results),
+        )
+        return results
+
+    def extract_basic_audio_batch(
+        self, pairs: list[tuple[str, str]], timeout: float | None = None
+    ) -> list[bool]:
+        """
+        Extract audio from several videos with a single FFmpeg invocation.
+
+        Uses the same settings as extract_basic_audio, but maps each input to
+        its own output so process start-up and FFmpeg initialization are paid
+        once for the whole batch. Blocking wrapper around
+        extract_basic_audio_batch_async.
+
+        Args:
+            pairs: (input_path, output_path) tuples
+            timeout: Timeout in seconds per file (defaults to the extractor's
+                timeout)
+
+        Returns:
+            Success flag for each pair, in the order given
+        """
+        return _run_sync(self.extract_basic_audio_batch_async(pairs, timeout))
+
+    async def extract_basic_audio_batch_async(
+        self, pairs: list[tuple[str, str]], timeout: float | None = None
+    ) -> list[bool]:
+        """
+        Asynchronous variant of extract_basic_audio_batch.
+
+        One bad input (a corrupt file, or one without an audio stream) makes
+        FFmpeg fail the whole invocation, so a failed batch is retried one
+        file at a time to find out which pairs actually succeed.
+
+        Args:
+            pairs: (input_path, output_path) tuples
+            timeout: Timeout in seconds per file (defaults to the extractor's
+                timeout)
+
+        Returns:
+            Success flag for each pair, in the order given
+        """
+        results, jobs, call = self._prepare_batch(pairs)
+        if call is None:
+            return results
+
+        logger.info("Starting batch audio extraction of %d files", len(jobs))
+        if timeout is None:
+            timeout = self.timeout
+        batch_timeout = timeout * len(jobs)
+        try:
+            returncode, stderr = await self._run_ffmpeg_async(
+                call.argv, batch_timeout, job_dir=call.job_dir
+            )
+            if returncode == 0:
+                _publish_staged(call)
+        except TimeoutError:
+            logger.error(
+                "Batch audio extraction timed out after %s seconds", batch_timeout
+            )
+            return results
+        except OSError as e:
+            logger.error("Batch audio extraction failed: %s", e)
+            return results
+        finally:
+            _discard_job(call)
+
+        if returncode != 0:
+            logger.warning(
+                "FFmpeg batch extraction failed, retrying files one at a time: %s",
+                stderr,
+            )
+            for index, input_file, output_file in jobs:
+                results[index] = await self.extract_basic_audio_async(
+                    str(input_file), str(output_file), timeout
+                )
+            logger.info(
+                "Batch audio extraction completed: %d/%d succeeded",
+                sum(results),
+                len(results),
+            )
+            return results
+
+        return self._collect_batch(results, jobs)
+
 
 def main() -> None:
     """Example usage of the AudioExtractor."""
@@ -358,7 +1167,7 @@ def main() -> None:
     try:
         extractor = AudioExtractor(container_engine=True)
     except RuntimeError as e:
-        logger.error(f"Failed to initialize AudioExtractor: {e}")
+        logger.error("Failed to initialize AudioExtractor: %s", e)
         return
 
     # Example: Extract audio from a video file
@@ -370,13 +1179,17 @@ def main() -> None:
         logger.info("=== Basic Audio Extraction ===")
         success = extractor.extract_basic_audio(input_video, output_audio)
         if success:
-            logger.info(f"✓ Basic audio extraction successful: {output_audio}")
+            logger.info("✓ Basic audio extraction successful: %s", output_audio)
         else:
             logger.error("✗ Basic audio extraction failed")
 
     except Exception as e:
-        logger.error(f"Error: {e}")
+        logger.error("Error: %s", e)
 
 
 if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
     main()
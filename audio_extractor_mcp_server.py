@@ -4,14 +4,22 @@ Audio Extraction MCP Server
 A Model Context Protocol server that provides audio extraction from video files.
 """
 
+import argparse
 import asyncio
+import concurrent.futures
 import logging
+import math
+import os
+import stat
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Literal
 
 from fastmcp import FastMCP
 
 # Import the AudioExtractor class from our existing module
-from audio_extractor import AudioExtractor
+from audio_extractor import AudioExtractor, _norm_ext, resolve_ffmpeg_mode
 
 # Configure logging
 logging.basicConfig(
@@ -29,15 +37,144 @@ mcp = FastMCP(
     """,
 )
 
-# Initialize the AudioExtractor (we'll make this configurable)
+# Most recently used AudioExtractor, plus a small LRU of extractors keyed by
+# the resolved (container_engine, container_runtime) so each configuration's
+# FFmpeg container and verification are reused for the server's lifetime;
+# timeouts are per call. Entries are futures, pending while the extractor is
+# being created outside the lock
 audio_extractor = None
+MAX_CACHED_EXTRACTORS = 4
+extractors: OrderedDict[tuple[bool, str], concurrent.futures.Future[AudioExtractor]] = (
+    OrderedDict()
+)
+extractors_lock = threading.Lock()
+
+# Jobs running on each extractor; an extractor evicted from the LRU while
+# jobs still run in its container is closed when the last one finishes
+extractor_jobs: dict[AudioExtractor, int] = {}
+evicted_extractors: set[AudioExtractor] = set()
+
+# Maximum number of concurrent FFmpeg jobs (override with --jobs)
+max_jobs = os.cpu_count() or 1
+job_slots: asyncio.Semaphore | None = None
+
+# Host directory mounted read-only into each extractor's long-lived FFmpeg
+# container (override with --workspace); None uses the working directory
+workspace_dir: str | None = None
+
+# Fewest files a batch job is given before a batch is split across more jobs,
+# so each FFmpeg invocation amortizes its start-up over several files
+MIN_FILES_PER_JOB = 4
+
+
+def _get_job_slots() -> asyncio.Semaphore:
+    """Return the semaphore that bounds concurrent FFmpeg jobs."""
+    global job_slots
+    if job_slots is None:
+        job_slots = asyncio.Semaphore(max_jobs)
+    return job_slots
+
+
+def _acquire_extractor(
+    use_container: bool | Literal["auto"], container_runtime: str
+) -> AudioExtractor:
+    """
+    Return the shared AudioExtractor for a configuration, creating it on first
+    use, and count a job on it until _release_extractor is called.
+
+    The least recently used extractor is evicted once more than
+    MAX_CACHED_EXTRACTORS configurations are in use; it is closed right away
+    if idle, else when its last job is released. Thread-safe, so the
+    start-up prewarm and the first request share one extractor.
+
+    Creating an extractor can pull an image and start a container, so it
+    happens outside the lock: the first caller for a configuration inserts a
+    pending future and builds the extractor, and later callers wait on it.
+    """
+    global audio_extractor
+    container_engine, container_runtime = resolve_ffmpeg_mode(
+        use_container, container_runtime
+    )
+    # A local FFmpeg ignores the runtime
+    config = (container_engine, container_runtime if container_engine else "")
+    while True:
+        evicted = None
+        with extractors_lock:
+            pending = extractors.get(config)
+            if pending is not None and pending.done():
+                extractor = pending.result()
+                extractors.move_to_end(config)
+                extractor_jobs[extractor] = extractor_jobs.get(extractor, 0) + 1
+                audio_extractor = extractor
+                return extractor
+            creating = pending is None
+            if creating:
+                pending = extractors[config] = concurrent.futures.Future()
+                evicted = _evict_extractor()
+
+        if evicted is not None:
+            evicted.close()
+        if not creating:
+            pending.result()  # Wait for its creator; raises if creation failed
+            continue
+
+        try:
+            extractor = AudioExtractor(
+                container_engine=container_engine,
+                container_runtime=container_runtime,
+                workspace_dir=workspace_dir,
+            )
+        except BaseException as e:
+            with extractors_lock:
+                del extractors[config]
+            pending.set_exception(e)
+            raise
+        pending.set_result(extractor)
+
+
+def _evict_extractor() -> AudioExtractor | None:
+    """
+    Drop the least recently used ready extractor if the LRU is over capacity.
+    Call with extractors_lock held.
+
+    Returns:
+        The evicted extractor if it is idle and should be closed (outside the
+        lock), else None
+    """
+    if len(extractors) <= MAX_CACHED_EXTRACTORS:
+        return None
+    for config, pending in extractors.items():
+        if pending.done():
+            break
+    else:
+        return None  # Every entry is still being created
+
+    del extractors[config]
+    extractor = pending.result()
+    if extractor in extractor_jobs:
+        evicted_extractors.add(extractor)
+        return None
+    return extractor
+
+
+def _release_extractor(extractor: AudioExtractor) -> None:
+    """Finish a job counted by _acquire_extractor."""
+    with extractors_lock:
+        extractor_jobs[extractor] -= 1
+        if extractor_jobs[extractor]:
+            return
+        del extractor_jobs[extractor]
+        if extractor not in evicted_extractors:
+            return
+        evicted_extractors.discard(extractor)
+    extractor.close()
 
 
 @mcp.tool()
 async def extract_audio(
     input_video_path: str,
     output_audio_path: str,
-    use_container: bool = True,
+    use_container: bool | Literal["auto"] = "auto",
     container_runtime: str = "auto",
     timeout: int = 600,
 ) -> dict:
@@ -47,7 +184,8 @@ async def extract_audio(
     Args:
         input_video_path: Path to the input video file
         output_audio_path: Path where the extracted audio file will be saved
-        use_container: Whether to use container-based FFmpeg (default: True)
+        use_container: Whether to use container-based FFmpeg; "auto" (default)
+            prefers a local FFmpeg when one is installed
         container_runtime: Container runtime to use ('auto', 'podman', 'docker')
         timeout: Timeout in seconds for the extraction process
 
@@ -55,21 +193,31 @@ async def extract_audio(
         Dictionary containing extraction results and metadata
     """
     try:
-        # Initialize extractor with current parameters
-        global audio_extractor
-        audio_extractor = AudioExtractor(
-            container_engine=use_container,
-            container_runtime=container_runtime,
-            timeout=timeout,
+        # Creating an extractor can start a container (and pull its image),
+        # so do it off the event loop
+        extractor = await asyncio.to_thread(
+            _acquire_extractor, use_container, container_runtime
         )
+    except Exception as e:
+        error_msg = f"Audio extraction error: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "error": error_msg,
+            "input_path": input_video_path,
+            "output_path": output_audio_path,
+        }
 
+    try:
         logger.info(
-            f"Starting audio extraction: {input_video_path} -> {output_audio_path}"
+            "Starting audio extraction: %s -> %s", input_video_path, output_audio_path
         )
 
-        # Validate input file exists
-        input_path = Path(input_video_path)
-        if not input_path.exists():
+        # Validate input file exists; the same stat provides its size for
+        # metadata and is handed to the extractor, which would stat it again
+        try:
+            input_stat = os.stat(input_video_path)
+        except FileNotFoundError:
             return {
                 "success": False,
                 "error": f"Input video file not found: {input_video_path}",
@@ -77,23 +225,20 @@ async def extract_audio(
                 "output_path": output_audio_path,
             }
 
-        # Get input file size for metadata
-        input_size_mb = input_path.stat().st_size / (1024 * 1024)
+        input_size_mb = input_stat.st_size / (1024 * 1024)
 
-        # Run the extraction in an executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(
-            None,
-            audio_extractor.extract_basic_audio,
-            input_video_path,
-            output_audio_path,
-        )
+        # Run FFmpeg as an asyncio subprocess, bounded by the shared job slots
+        async with _get_job_slots():
+            success = await extractor.extract_basic_audio_async(
+                input_video_path, output_audio_path, timeout, input_stat
+            )
 
         # Check if output file was created and get its size
-        output_path = Path(output_audio_path)
         output_size_mb = 0
-        if output_path.exists():
-            output_size_mb = output_path.stat().st_size / (1024 * 1024)
+        try:
+            output_size_mb = os.stat(output_audio_path).st_size / (1024 * 1024)
+        except FileNotFoundError:
+            pass
 
         result = {
             "success": success,
@@ -105,7 +250,7 @@ async def extract_audio(
                 "sample_rate": 16000,
                 "channels": 1,
                 "codec": "pcm_s16le",
-                "container_engine": use_container,
+                "container_engine": extractor.container_engine,
                 "container_runtime": container_runtime,
             },
         }
@@ -114,7 +259,9 @@ async def extract_audio(
             result["error"] = "Audio extraction failed. Check server logs for details."
 
         logger.info(
-            f"Audio extraction {'completed' if success else 'failed'}: {output_audio_path}"
+            "Audio extraction %s: %s",
+            "completed" if success else "failed",
+            output_audio_path,
         )
         return result
 
@@ -127,6 +274,104 @@ async def extract_audio(
             "input_path": input_video_path,
             "output_path": output_audio_path,
         }
+    finally:
+        await asyncio.to_thread(_release_extractor, extractor)
+
+
+@mcp.tool()
+async def extract_audio_batch(
+    input_video_paths: list[str],
+    output_audio_paths: list[str],
+    use_container: bool | Literal["auto"] = "auto",
+    container_runtime: str = "auto",
+    timeout: int = 600,
+) -> dict:
+    """
+    Extract audio from several video files, spreading them across up to
+    --jobs concurrent FFmpeg runs that each process their share in one pass.
+
+    Args:
+        input_video_paths: Paths to the input video files
+        output_audio_paths: Output audio paths, one per input video
+        use_container: Whether to use container-based FFmpeg; "auto" (default)
+            prefers a local FFmpeg when one is installed
+        container_runtime: Container runtime to use ('auto', 'podman', 'docker')
+        timeout: Timeout in seconds per file for the extraction process
+
+    Returns:
+        Dictionary containing per-file extraction results
+    """
+    if len(input_video_paths) != len(output_audio_paths):
+        return {
+            "success": False,
+            "error": "input_video_paths and output_audio_paths must have the same length",
+            "results": [],
+        }
+
+    try:
+        # Creating an extractor can start a container (and pull its image),
+        # so do it off the event loop
+        extractor = await asyncio.to_thread(
+            _acquire_extractor, use_container, container_runtime
+        )
+    except Exception as e:
+        error_msg = f"Batch audio extraction error: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg, "results": []}
+
+    try:
+        logger.info(
+            "Starting batch audio extraction of %d files", len(input_video_paths)
+        )
+
+        # Split the batch across the job slots, but only once each job gets
+        # several files; each job runs one FFmpeg invocation over its share
+        pairs = list(zip(input_video_paths, output_audio_paths))
+        workers = max(1, min(max_jobs, math.ceil(len(pairs) / MIN_FILES_PER_JOB)))
+        groups = [pairs[i::workers] for i in range(workers)]
+
+        async def run_group(group: list[tuple[str, str]]) -> list[bool]:
+            async with _get_job_slots():
+                return await extractor.extract_basic_audio_batch_async(group, timeout)
+
+        group_successes = await asyncio.gather(*(run_group(g) for g in groups))
+        successes = [False] * len(pairs)
+        for i, group_success in enumerate(group_successes):
+            successes[i::workers] = group_success
+
+        results = []
+        for (input_video_path, output_audio_path), success in zip(pairs, successes):
+            output_path = Path(output_audio_path)
+            output_size_mb = 0
+            if success:
+                output_size_mb = output_path.stat().st_size / (1024 * 1024)
+            results.append(
+                {
+                    "success": success,
+                    "input_path": input_video_path,
+                    "output_path": output_audio_path,
+                    "output_size_mb": round(output_size_mb, 2),
+                }
+            )
+
+        return {
+            "success": all(successes),
+            "results": results,
+            "settings": {
+                "sample_rate": 16000,
+                "channels": 1,
+                "codec": "pcm_s16le",
+                "container_engine": extractor.container_engine,
+                "container_runtime": container_runtime,
+            },
+        }
+
+    except Exception as e:
+        error_msg = f"Batch audio extraction error: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg, "results": []}
+    finally:
+        await asyncio.to_thread(_release_extractor, extractor)
 
 
 @mcp.tool()
@@ -150,6 +395,44 @@ async def get_supported_formats() -> dict:
     }
 
 
+def _video_file_info(path: str, filename: str, file_stat: os.stat_result) -> dict:
+    """Build the validation result for a regular file from its stat."""
+    # Check file extension
+    file_extension = _norm_ext(Path(filename).suffix)
+    is_supported_format = file_extension in AudioExtractor.SUPPORTED_VIDEO_FORMATS
+
+    # Get file size
+    file_size_bytes = file_stat.st_size
+    file_size_mb = file_size_bytes / (1024 * 1024)
+    file_size_gb = file_size_mb / 1024
+
+    result = {
+        "valid": True,
+        "path": path,
+        "filename": filename,
+        "extension": file_extension,
+        "supported_format": is_supported_format,
+        "size_bytes": file_size_bytes,
+        "size_mb": round(file_size_mb, 2),
+        "size_gb": round(file_size_gb, 3),
+        "warnings": [],
+    }
+
+    # Add warnings for potential issues
+    if not is_supported_format:
+        result["warnings"].append(
+            f"File format {file_extension} may not be supported. "
+            f"Supported formats: {', '.join(AudioExtractor.SUPPORTED_VIDEO_FORMATS)}"
+        )
+
+    if file_size_gb > 1:
+        result["warnings"].append(
+            f"Large file detected ({file_size_gb:.1f}GB). Processing may take a while."
+        )
+
+    return result
+
+
 @mcp.tool()
 async def validate_video_file(video_path: str) -> dict:
     """
@@ -164,62 +447,111 @@ async def validate_video_file(video_path: str) -> dict:
     try:
         video_file = Path(video_path)
 
-        if not video_file.exists():
+        # One stat answers existence, type and size
+        try:
+            video_stat = os.stat(video_file)
+        except FileNotFoundError:
             return {
                 "valid": False,
                 "error": f"File not found: {video_path}",
                 "path": video_path,
             }
 
-        if not video_file.is_file():
+        if not stat.S_ISREG(video_stat.st_mode):
             return {
                 "valid": False,
                 "error": f"Path is not a file: {video_path}",
                 "path": video_path,
             }
 
-        # Check file extension
-        file_extension = video_file.suffix.lower()
-        is_supported_format = file_extension in AudioExtractor.SUPPORTED_VIDEO_FORMATS
-
-        # Get file size
-        file_size_bytes = video_file.stat().st_size
-        file_size_mb = file_size_bytes / (1024 * 1024)
-        file_size_gb = file_size_mb / 1024
+        return _video_file_info(video_path, video_file.name, video_stat)
 
-        result = {
-            "valid": True,
+    except Exception as e:
+        return {
+            "valid": False,
+            "error": f"Validation error: {str(e)}",
             "path": video_path,
-            "filename": video_file.name,
-            "extension": file_extension,
-            "supported_format": is_supported_format,
-            "size_bytes": file_size_bytes,
-            "size_mb": round(file_size_mb, 2),
-            "size_gb": round(file_size_gb, 3),
-            "warnings": [],
         }
 
-        # Add warnings for potential issues
-        if not is_supported_format:
-            result["warnings"].append(
-                f"File format {file_extension} may not be supported. "
-                f"Supported formats: {', '.join(AudioExtractor.SUPPORTED_VIDEO_FORMATS)}"
-            )
 
-        if file_size_gb > 1:
-            result["warnings"].append(
-                f"Large file detected ({file_size_gb:.1f}GB). Processing may take a while."
-            )
+@mcp.tool()
+async def validate_video_dir(dir_path: str) -> dict:
+    """
+    Validate every supported video file in a directory in one call.
 
-        return result
+    Args:
+        dir_path: Path to the directory to scan (not recursive)
 
+    Returns:
+        Dictionary containing validation results for each video file found
+    """
+    try:
+        it = os.scandir(dir_path)
+    except FileNotFoundError:
+        return {
+            "valid": False,
+            "error": f"Directory not found: {dir_path}",
+            "path": dir_path,
+        }
+    except NotADirectoryError:
+        return {
+            "valid": False,
+            "error": f"Path is not a directory: {dir_path}",
+            "path": dir_path,
+        }
     except Exception as e:
         return {
             "valid": False,
             "error": f"Validation error: {str(e)}",
-            "path": video_path,
+            "path": dir_path,
+        }
+
+    # scandir yields names and types from one directory read; DirEntry
+    # caches its stat, so no per-file Path round-trips are needed
+    files = []
+    try:
+        with it:
+            for entry in it:
+                if (
+                    _norm_ext(Path(entry.name).suffix)
+                    not in AudioExtractor.SUPPORTED_VIDEO_FORMATS
+                ):
+                    continue
+                # An entry can vanish or become unreadable after the scan;
+                # that affects only its own result
+                try:
+                    if not entry.is_file():
+                        continue
+                    entry_stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    files.append(
+                        {
+                            "valid": False,
+                            "error": f"Validation error: {str(e)}",
+                            "path": entry.path,
+                            "filename": entry.name,
+                        }
+                    )
+                    continue
+                files.append(_video_file_info(entry.path, entry.name, entry_stat))
+    except Exception as e:
+        return {
+            "valid": False,
+            "error": f"Validation error: {str(e)}",
+            "path": dir_path,
         }
 
+    files.sort(key=lambda info: info["filename"])
+    return {
+        "valid": True,
+        "path": dir_path,
+        "total_files": len(files),
+        "total_size_bytes": sum(info.get("size_bytes", 0) for info in files),
+        "files": files,
+    }
+
 
 @mcp.resource("config://server/settings")
 async def get_server_settings() -> dict:
@@ -232,8 +564,9 @@ async def get_server_settings() -> dict:
         "server_name": "Audio Extraction Server",
         "version": "1.0.0",
         "extractor_initialized": audio_extractor is not None,
+        "cached_extractors": len(extractors),
         "default_settings": {
-            "container_engine": True,
+            "container_engine": "auto",
             "container_runtime": "auto",
             "timeout": 600,
             "target_sample_rate": 16000,
@@ -253,7 +586,49 @@ async def get_server_settings() -> dict:
     return settings
 
 
+def _prewarm() -> None:
+    """
+    Create the extractor for the default tool settings ahead of the first
+    request, so image resolution (including a cold pull), container start-up
+    and FFmpeg verification happen off the request path.
+    """
+    try:
+        extractor = _acquire_extractor("auto", "auto")
+    except RuntimeError as e:
+        logger.warning("FFmpeg prewarm failed: %s", e)
+        return
+    _release_extractor(extractor)
+    logger.info(
+        "FFmpeg prewarmed (%s)",
+        "container" if extractor.container_engine else "local",
+    )
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audio Extraction MCP Server")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max_jobs,
+        help="Maximum number of concurrent FFmpeg jobs (default: CPU count)",
+    )
+    parser.add_argument(
+        "--workspace",
+        help="Directory mounted read-only into the FFmpeg container, so videos "
+        "under it need no per-call mounts (default: working directory)",
+    )
+    parser.add_argument(
+        "--no-prewarm",
+        action="store_true",
+        help="Don't prepare the default FFmpeg container at start-up",
+    )
+    args = parser.parse_args()
+    max_jobs = max(1, args.jobs)
+    workspace_dir = args.workspace
+
+    if not args.no_prewarm:
+        threading.Thread(target=_prewarm, name="ffmpeg-prewarm", daemon=True).start()
+
     # Run the server
     logger.info("Starting Audio Extraction MCP Server...")
     mcp.run()
@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""
+Audio Transcription Helpers for AssemblyAI
+Chunked parallel transcription of long audio and local subtitle rendering
+"""
+
+import array
+import asyncio
+import bisect
+import concurrent.futures
+import functools
+import hashlib
+import heapq
+import io
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import assemblyai as aai
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib json module is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Layout of the PCM that AudioExtractor.extract_s16_mono_16k produces
+SAMPLE_RATE = 16000
+_BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono
+
+
+class Word(NamedTuple):
+    """A transcribed word with start and end times in milliseconds."""
+
+    start: int
+    end: int
+    text: str
+
+
+def audio_digest(path: str, file_stat: os.stat_result | None = None) -> str:
+    """
+    Hash an audio file's contents so identical audio maps to one cache entry
+    whatever its name or location.
+
+    Given the file's stat result, an unchanged file (same inode, size and
+    modification time) reuses its digest instead of being read again.
+    """
+    if file_stat is None:
+        return _hash_file(path)
+    return _cached_digest(
+        path,
+        file_stat.st_dev,
+        file_stat.st_ino,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_digest(path: str, dev: int, ino: int, size: int, mtime_ns: int) -> str:
+    """Hash a file, memoized on its identity and modification state."""
+    return _hash_file(path)
+
+
+def _hash_file(path: str) -> str:
+    """BLAKE2b-128 of a file's contents, as hex."""
+    with open(path, "rb", buffering=0) as f:
+        # The file is read front to back once; let the kernel read ahead
+        # aggressively so hashing isn't stalled on cold storage
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=16)
+        ).hexdigest()
+
+
+def release_page_cache(path: str) -> None:
+    """
+    Tell the kernel a file's cached pages won't be needed again, so batches
+    over many large recordings don't crowd other data out of the page cache.
+    A no-op where posix_fadvise is unavailable.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _json_dumps(value: object) -> bytes:
+    """Serialize to UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        # orjson only serializes plain tuples, not NamedTuple subclasses
+        return orjson.dumps(value, default=tuple)
+    return json.dumps(value, ensure_ascii=False).encode()
+
+
+def _json_loads(data: bytes) -> object:
+    """Parse UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class TranscriptCache:
+    """
+    On-disk cache of transcription results, keyed by audio content and settings.
+
+    An entry is a JSON object: the provider's transcript id and exported
+    subtitles, or the words subtitles are rendered from locally. One cached
+    transcription serves every repeat request for the same audio. The
+    directory is bounded to max_entries, evicting the least recently used.
+    With max_entries=0 the cache is disabled: nothing is read or written.
+    """
+
+    def __init__(self, directory: Path | None = None, max_entries: int = 256):
+        if directory is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            directory = Path(cache_home) / "video-transcribe"
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    def _path(self, digest: str, variant: str) -> Path:
+        return self.directory / f"{digest}-{variant}.json"
+
+    def get(self, digest: str, variant: str) -> dict | None:
+        """
+        Look up a cached entry.
+
+        Args:
+            digest: audio_digest of the audio file
+            variant: Settings the entry depends on, e.g. model and language
+
+        Returns:
+            The cached entry, or None on a miss
+        """
+        if not self.max_entries:
+            return None
+        path = self._path(digest, variant)
+        try:
+            with open(path, "rb") as f:
+                entry = _json_loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            return None
+        # Mark as recently used; a read-only cache still serves its hits
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, digest: str, variant: str, entry: dict) -> None:
+        """Store an entry, then evict old entries beyond max_entries."""
+        if not self.max_entries:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError as e:
+            logger.warning("Failed to cache transcript: %s", e)
+            return
+        # Write to a temporary file and rename so readers never see a partial entry
+        try:
+            with open(fd, "wb") as f:
+                f.write(_json_dumps(entry))
+            os.replace(tmp_path, self._path(digest, variant))
+        except OSError as e:
+            logger.warning("Failed to cache transcript: %s", e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries beyond max_entries."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass  # Evicted concurrently by another writer
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        for _, path in heapq.nsmallest(excess, entries):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# WAV format tags of uncompressed audio: PCM, IEEE float, and extensible
+# (whose subformat is PCM or float in practice)
+_UNCOMPRESSED_WAV_FORMATS = frozenset({0x0001, 0x0003, 0xFFFE})
+
+
+def is_oversized_pcm_wav(path: str) -> bool:
+    """
+    Check whether a file is an uncompressed WAV with a higher sample rate,
+    more channels or more bits per sample than 16kHz mono 16-bit PCM, so
+    decoding it to that format shrinks the upload. Only the RIFF and fmt
+    headers are read.
+
+    Compressed audio (MP3, M4A, Ogg, Opus, FLAC) is already smaller than
+    the decoded PCM would be, so it never counts.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(36)
+    except OSError:
+        return False
+    if len(header) < 36:
+        return False
+    riff, _, wave, fmt, _, audio_format, channels, sample_rate = struct.unpack_from(
+        "<4sI4s4sIHHI", header
+    )
+    bits_per_sample = struct.unpack_from("<H", header, 34)[0]
+    return (
+        (riff, wave, fmt) == (b"RIFF", b"WAVE", b"fmt ")
+        and audio_format in _UNCOMPRESSED_WAV_FORMATS
+        and (sample_rate > SAMPLE_RATE or channels > 1 or bits_per_sample > 16)
+    )
+
+
+def _wav_header(data_size: int) -> bytes:
+    """Build a 44-byte header for 16kHz mono 16-bit PCM of the given size."""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,  # fmt chunk size
+        1,  # PCM
+        1,  # mono
+        SAMPLE_RATE,
+        _BYTES_PER_SECOND,
+        2,  # block align
+        16,  # bits per sample
+        b"data",
+        data_size,
+    )
+
+
+class _WavStream(io.RawIOBase):
+    """
+    Read-only, seekable file object presenting 16kHz mono PCM as a WAV file.
+
+    Reads are served straight from the PCM buffer, so uploading doesn't
+    first copy the whole recording into one header-plus-data bytes object.
+    Being seekable lets the HTTP client send a Content-Length.
+    """
+
+    def __init__(self, pcm: bytes | bytearray | memoryview):
+        self._header = _wav_header(len(pcm))
+        self._pcm = memoryview(pcm)
+        self._size = len(self._header) + len(self._pcm)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position: {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        header_size = len(self._header)
+        if self._pos < header_size:
+            source = memoryview(self._header)[self._pos :]
+        else:
+            source = self._pcm[self._pos - header_size :]
+        count = min(len(buffer), len(source))
+        buffer[:count] = source[:count]
+        self._pos += count
+        return count
+
+
+def _chunk_bounds(
+    total_bytes: int, chunk_seconds: int, overlap_seconds: int
+) -> list[tuple[int, int]]:
+    """
+    Split a PCM stream into windows of chunk_seconds that each run
+    overlap_seconds into the next window.
+
+    Returns:
+        (start, end) byte offsets per window
+    """
+    step = chunk_seconds * _BYTES_PER_SECOND
+    overlap = overlap_seconds * _BYTES_PER_SECOND
+    bounds = []
+    for start in range(0, total_bytes, step):
+        bounds.append((start, min(start + step + overlap, total_bytes)))
+        if start + step + overlap >= total_bytes:
+            break
+    return bounds
+
+
+def _merge_chunks(chunks: list[tuple[int, list[Word]]], overlap_ms: int) -> list[Word]:
+    """
+    Merge per-chunk words, already shifted onto the full timeline, in order.
+
+    Neighbouring chunks both transcribe their overlap, so each boundary is
+    cut at the middle of the overlap: the earlier chunk keeps words that
+    start before it, the later chunk keeps the rest. The midpoint is where
+    both chunks have the most context on either side.
+
+    Args:
+        chunks: (chunk start in ms, words) per chunk, in timeline order
+        overlap_ms: Length of the overlap between neighbouring chunks
+    """
+    merged: list[Word] = []
+    lower = 0
+    for index, (_, words) in enumerate(chunks):
+        if index + 1 < len(chunks):
+            upper = chunks[index + 1][0] + overlap_ms // 2
+        else:
+            upper = None
+        merged.extend(
+            w for w in words if w.start >= lower and (upper is None or w.start < upper)
+        )
+        lower = upper
+    return merged
+
+
+async def run_blocking(
+    executor: concurrent.futures.Executor | None, func: Callable[..., Any], *args
+) -> Any:
+    """Run a blocking SDK call in an executor (the loop's default one if None)."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def transcript_words(transcript: aai.Transcript, offset_ms: int = 0) -> list[Word]:
+    """Return a transcript's words, shifted by offset_ms."""
+    return [
+        Word(w.start + offset_ms, w.end + offset_ms, w.text)
+        for w in transcript.words or []
+    ]
+
+
+def _upload_pcm(
+    transcriber: aai.Transcriber, pcm: bytes | memoryview
+) -> aai.Transcript:
+    """
+    Upload PCM as an in-memory WAV and wait for its transcript.
+
+    Raises:
+        RuntimeError: If the transcription fails
+    """
+    transcript = transcriber.transcribe(_WavStream(pcm))
+    if transcript.status == "error":
+        raise RuntimeError(f"Transcription failed: {transcript.error}")
+    return transcript
+
+
+def _transcribe_pcm(
+    transcriber: aai.Transcriber, pcm: bytes | memoryview, offset_ms: int = 0
+) -> list[Word]:
+    """
+    Upload PCM as an in-memory WAV and return its words, shifted by
+    offset_ms. Blocks until the transcription completes.
+
+    Raises:
+        RuntimeError: If the transcription fails
+    """
+    return transcript_words(_upload_pcm(transcriber, pcm), offset_ms)
+
+
+async def transcribe_pcm(
+    transcriber: aai.Transcriber,
+    pcm: bytes | bytearray,
+    executor: concurrent.futures.Executor | None = None,
+) -> aai.Transcript:
+    """
+    Transcribe 16kHz mono 16-bit PCM in one request.
+
+    Uploading decoded speech-rate PCM instead of the original file keeps
+    the upload to what the model uses: a 48kHz stereo WAV shrinks sixfold.
+
+    Args:
+        transcriber: Transcriber whose configuration is used
+        pcm: 16kHz mono 16-bit PCM, as from AudioExtractor.extract_s16_mono_16k
+        executor: Executor the blocking upload and poll run in
+
+    Returns:
+        The completed transcript
+
+    Raises:
+        RuntimeError: If the transcription fails
+    """
+    return await run_blocking(executor, _upload_pcm, transcriber, pcm)
+
+
+async def transcribe_chunked(
+    transcriber: aai.Transcriber,
+    pcm: bytes | bytearray,
+    chunk_seconds: int = 300,
+    overlap_seconds: int = 2,
+    max_concurrency: int = 5,
+    executor: concurrent.futures.Executor | None = None,
+) -> list[Word]:
+    """
+    Transcribe long audio as overlapping chunks submitted concurrently.
+
+    Each chunk is uploaded as its own in-memory WAV, so a long recording no
+    longer waits on one monolithic transcription. The semaphore keeps the
+    number of in-flight requests within the provider's concurrency limit.
+
+    Args:
+        transcriber: Transcriber whose configuration is used for every chunk
+        pcm: 16kHz mono 16-bit PCM, as from AudioExtractor.extract_s16_mono_16k
+        chunk_seconds: Length of each chunk, excluding overlap
+        overlap_seconds: Audio shared between neighbouring chunks so words on
+            a boundary are heard whole by at least one of them
+        max_concurrency: Maximum number of chunks transcribed at once
+        executor: Executor each chunk's blocking upload and poll run in
+
+    Returns:
+        Words on the timeline of the full audio, in order
+
+    Raises:
+        RuntimeError: If any chunk fails to transcribe
+    """
+    bounds = _chunk_bounds(len(pcm), chunk_seconds, overlap_seconds)
+    logger.info("Transcribing %d chunks of up to %ds", len(bounds), chunk_seconds)
+    view = memoryview(pcm)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def transcribe_one(start: int, end: int) -> tuple[int, list[Word]]:
+        offset_ms = start * 1000 // _BYTES_PER_SECOND
+        async with semaphore:
+            words = await run_blocking(
+                executor, _transcribe_pcm, transcriber, view[start:end], offset_ms
+            )
+        return offset_ms, words
+
+    chunks = await asyncio.gather(*(transcribe_one(s, e) for s, e in bounds))
+    return _merge_chunks(chunks, overlap_seconds * 1000)
+
+
+# Silence detection works on frames of this length, reading every
+# _SILENCE_STRIDE-th sample: loud speech spans many samples, so the
+# subsampled peak finds it at a fraction of the cost
+_SILENCE_FRAME_MS = 100
+_SILENCE_STRIDE = 4
+
+
+def find_speech(
+    pcm: bytes | bytearray,
+    threshold_db: float = -40.0,
+    min_silence_ms: int = 1000,
+    padding_ms: int = 250,
+) -> list[tuple[int, int]]:
+    """
+    Find the parts of 16kHz mono 16-bit PCM that aren't silent.
+
+    A frame is silent when its peak stays below threshold_db (relative to
+    full scale). Only silences of at least min_silence_ms count as gaps,
+    and every sounding span keeps padding_ms either side, so pauses between
+    words and the edges of quiet syllables are kept.
+
+    Returns:
+        (start ms, end ms) of each sounding span, in order
+    """
+    samples = memoryview(pcm)[: len(pcm) & ~1].cast("h")
+    if sys.byteorder == "big":
+        samples = array.array("h", samples)
+        samples.byteswap()
+    limit = int(32768 * 10 ** (threshold_db / 20))
+    frame = SAMPLE_RATE * _SILENCE_FRAME_MS // 1000
+    total_ms = len(samples) * 1000 // SAMPLE_RATE
+    # Gaps too short to outlast the padding on both sides would overlap
+    min_gap_ms = max(min_silence_ms, 2 * padding_ms)
+
+    spans: list[tuple[int, int]] = []
+    for index in range(0, len(samples), frame):
+        window = samples[index : index + frame : _SILENCE_STRIDE]
+        if max(window) < limit and min(window) > -limit:
+            continue
+        start = index * 1000 // SAMPLE_RATE
+        end = start + _SILENCE_FRAME_MS
+        if spans and start - spans[-1][1] < min_gap_ms:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return [
+        (max(start - padding_ms, 0), min(end + padding_ms, total_ms))
+        for start, end in spans
+    ]
+
+
+def remove_silence(
+    pcm: bytes | bytearray, spans: list[tuple[int, int]]
+) -> tuple[bytearray, list[tuple[int, int]]]:
+    """
+    Keep only the given spans of PCM, joined end to end.
+
+    Returns:
+        The joined PCM, and (start ms in the joined audio, start ms in the
+        original audio) per span, for restore_timeline
+    """
+    view = memoryview(pcm)
+    speech = bytearray()
+    offsets = []
+    for start, end in spans:
+        offsets.append((len(speech) * 1000 // _BYTES_PER_SECOND, start))
+        speech += view[
+            start * _BYTES_PER_SECOND // 1000 : end * _BYTES_PER_SECOND // 1000
+        ]
+    return speech, offsets
+
+
+def restore_timeline(words: list[Word], offsets: list[tuple[int, int]]) -> list[Word]:
+    """
+    Move words transcribed from remove_silence output back onto the
+    original audio's timeline.
+
+    Each word moves by the shift of the span it starts in, so a word heard
+    across a cut keeps its duration instead of stretching over the silence.
+    """
+    if not offsets:
+        return words
+    joined_starts = [joined for joined, _ in offsets]
+    restored = []
+    for w in words:
+        index = max(bisect.bisect_right(joined_starts, w.start) - 1, 0)
+        joined, original = offsets[index]
+        shift = original - joined
+        restored.append(Word(w.start + shift, w.end + shift, w.text))
+    return restored
+
+
+# Languages written without spaces between words; their word texts are
+# joined directly
+_UNSPACED_LANGUAGES = frozenset({"ja", "zh", "th", "lo", "km", "my"})
+
+
+def word_separator(language_code: str) -> str:
+    """Return the text that goes between words of a language in a cue."""
+    language = language_code.lower().replace("-", "_").split("_")[0]
+    return "" if language in _UNSPACED_LANGUAGES else " "
+
+
+def build_cues(
+    words: list[Word],
+    chars_per_caption: int = 32,
+    max_gap_ms: int = 1000,
+    max_duration_ms: int = 7000,
+    separator: str = " ",
+) -> list[tuple[int, int, str]]:
+    """
+    Group words into subtitle cues.
+
+    A cue ends when the next word would push it past chars_per_caption,
+    would keep it on screen longer than max_duration_ms, or follows a
+    pause longer than max_gap_ms.
+
+    Args:
+        words: Words in order
+        chars_per_caption: Maximum length of a cue's text
+        max_gap_ms: Longest pause kept inside one cue
+        max_duration_ms: Longest time one cue stays on screen
+        separator: Text between words, from word_separator
+
+    Returns:
+        (start ms, end ms, text) per cue
+    """
+    cues = []
+    texts: list[str] = []
+    gap = len(separator)
+    length = 0
+    start = end = 0
+    for word in words:
+        if texts and (
+            length + gap + len(word.text) > chars_per_caption
+            or word.end - start > max_duration_ms
+            or word.start - end > max_gap_ms
+        ):
+            cues.append((start, end, separator.join(texts)))
+            texts = []
+        if not texts:
+            start = word.start
+            length = -gap
+        texts.append(word.text)
+        length += gap + len(word.text)
+        end = word.end
+    if texts:
+        cues.append((start, end, separator.join(texts)))
+    return cues
+
+
+# Preformatted "MM:SS" for every second of an hour and "mmm" for every
+# millisecond, so a timestamp costs two lookups instead of four formats
+_CLOCK = [f"{m:02d}:{s:02d}" for m in range(60) for s in range(60)]
+_MILLIS = [f"{ms:03d}" for ms in range(1000)]
+
+
+def _timestamp(ms: int, separator: str) -> str:
+    """Format milliseconds as HH:MM:SS<separator>mmm."""
+    seconds, ms = divmod(ms, 1000)
+    hours, seconds = divmod(seconds, 3600)
+    return f"{hours:02d}:{_CLOCK[seconds]}{separator}{_MILLIS[ms]}"
+
+
+def _srt_blocks(cues: list[tuple[int, int, str]]) -> Iterator[str]:
+    """Yield the SRT text of each cue."""
+    for index, (start, end, text) in enumerate(cues, 1):
+        yield f"{index}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n\n"
+
+
+def _vtt_blocks(cues: list[tuple[int, int, str]]) -> Iterator[str]:
+    """Yield the WebVTT header, then the text of each cue."""
+    yield "WEBVTT\n\n"
+    for start, end, text in cues:
+        yield f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n\n"
+
+
+def to_srt(cues: list[tuple[int, int, str]]) -> str:
+    """Render cues as SRT subtitles."""
+    return "".join(_srt_blocks(cues))
+
+
+def to_vtt(cues: list[tuple[int, int, str]]) -> str:
+    """Render cues as WebVTT subtitles."""
+    return "".join(_vtt_blocks(cues))
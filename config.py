@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Transcription Settings
+Read once from the environment (or a .env file) and applied to the AssemblyAI SDK
+"""
+
+import functools
+import os
+from typing import NamedTuple
+
+import assemblyai as aai
+from dotenv import load_dotenv
+
+# AssemblyAI's EU endpoint, used unless ASSEMBLYAI_BASE_URL overrides it
+DEFAULT_ASSEMBLYAI_BASE_URL = "https://api.eu.assemblyai.com"
+
+# Where extracted audio is read from and subtitles are written to by default
+OUTPUT_DIR = "output"
+DEFAULT_AUDIO_FILE = f"{OUTPUT_DIR}/output.wav"
+
+
+class Settings(NamedTuple):
+    """Settings loaded from the environment."""
+
+    assemblyai_api_key: str
+    assemblyai_base_url: str
+
+
+@functools.cache
+def settings() -> Settings:
+    """
+    Load the settings and apply them to the AssemblyAI SDK.
+
+    Runs once per process; later calls return the same settings without
+    touching the SDK's globals again. Variables already set in the
+    environment take precedence over a .env file.
+
+    Raises:
+        RuntimeError: If ASSEMBLYAI_API_KEY is not set
+    """
+    load_dotenv()
+    api_key = os.environ.get("ASSEMBLYAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("ASSEMBLYAI_API_KEY is not set")
+
+    loaded = Settings(
+        assemblyai_api_key=api_key,
+        assemblyai_base_url=os.environ.get(
+            "ASSEMBLYAI_BASE_URL", DEFAULT_ASSEMBLYAI_BASE_URL
+        ),
+    )
+    aai.settings.api_key = loaded.assemblyai_api_key
+    aai.settings.base_url = loaded.assemblyai_base_url
+    return loaded
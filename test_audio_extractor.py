@@ -0,0 +1,181 @@
+"""
+Tests for the FFmpeg command building and path helpers in audio_extractor,
+run without FFmpeg or a container runtime
+"""
+
+import struct
+import wave
+from pathlib import Path
+
+from audio_extractor import (
+    _FFMPEG_LOG_ARGS,
+    _PID_FILE_WRAPPER,
+    AudioExtractor,
+    _container_dir,
+    _finalize_wav_header,
+    _publish_staged,
+    _to_mount_path,
+)
+
+
+def make_extractor(
+    workspace: Path, container_id: str | None = None, scratch: Path | None = None
+) -> AudioExtractor:
+    """
+    Build an extractor without verifying FFmpeg or starting a container.
+
+    Without a container id, FFmpeg runs locally; with one, commands are
+    built for that long-lived container, whose scratch mount is ``scratch``.
+    """
+    extractor = object.__new__(AudioExtractor)
+    extractor.container_engine = container_id is not None
+    extractor.container_runtime = "podman"
+    extractor.container_image = "ffmpeg-image"
+    extractor.timeout = 600
+    extractor.workspace_dir = workspace.resolve()
+    extractor._container_id = container_id
+    extractor._scratch_dir = scratch
+    extractor.target_sample_rate = 16000
+    extractor.target_channels = 1
+    return extractor
+
+
+def test_prepare_batch_builds_one_command_for_every_valid_pair(tmp_path):
+    videos = [tmp_path / "a.mp4", tmp_path / "b.mkv"]
+    for video in videos:
+        video.write_bytes(b"")
+    out = tmp_path / "out"
+    pairs = [
+        (str(videos[0]), str(out / "a.wav")),
+        (str(tmp_path / "missing.mp4"), str(out / "missing.wav")),
+        (str(videos[1]), str(out / "b.flac")),
+    ]
+
+    results, jobs, call = make_extractor(tmp_path)._prepare_batch(pairs)
+
+    assert results == [False, False, False]
+    assert [index for index, _, _ in jobs] == [0, 2]
+    argv = call.argv
+    assert argv[: 2 + len(_FFMPEG_LOG_ARGS)] == ["ffmpeg", *_FFMPEG_LOG_ARGS, "-y"]
+    inputs = [argv[i + 1] for i, arg in enumerate(argv) if arg == "-i"]
+    assert inputs == [str(videos[0].resolve()), str(videos[1].resolve())]
+    # Each output maps the audio of its own input, right before its path
+    maps = [argv[i + 1] for i, arg in enumerate(argv) if arg == "-map"]
+    assert maps == ["0:a:0", "1:a:0"]
+    assert argv.index(str((out / "a.wav").resolve())) < argv.index("1:a:0")
+    assert argv[-1] == str((out / "b.flac").resolve())
+    assert out.is_dir()
+
+
+def test_prepare_batch_without_valid_pairs_builds_no_command(tmp_path):
+    pairs = [(str(tmp_path / "missing.mp4"), str(tmp_path / "out.wav"))]
+
+    results, jobs, call = make_extractor(tmp_path)._prepare_batch(pairs)
+
+    assert (results, jobs, call) == ([False], [], None)
+
+
+def test_finalize_wav_header_fills_in_streamed_sizes(tmp_path):
+    # As FFmpeg writes it to a pipe: unknown sizes, a LIST chunk before data
+    fmt = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+    info = b"INFOISFT\x06\x00\x00\x00ffmpeg"
+    pcm = bytes(range(100))
+    path = tmp_path / "streamed.wav"
+    path.write_bytes(
+        b"".join(
+            [
+                b"RIFF\xff\xff\xff\xffWAVE",
+                b"fmt " + struct.pack("<I", len(fmt)) + fmt,
+                b"LIST" + struct.pack("<I", len(info)) + info,
+                b"data\xff\xff\xff\xff" + pcm,
+            ]
+        )
+    )
+
+    _finalize_wav_header(path)
+
+    data = path.read_bytes()
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    assert struct.unpack_from("<I", data, len(data) - len(pcm) - 4)[0] == len(pcm)
+    with wave.open(str(path)) as wav:
+        assert wav.readframes(wav.getnframes()) == pcm
+
+
+def test_finalize_wav_header_leaves_other_files_alone(tmp_path):
+    path = tmp_path / "audio.wav"
+    path.write_bytes(b"ID3\x04" + bytes(20))
+
+    _finalize_wav_header(path)
+
+    assert path.read_bytes() == b"ID3\x04" + bytes(20)
+
+
+def test_ffmpeg_prefix_stages_workspace_outputs_in_a_job_dir(tmp_path):
+    workspace = tmp_path / "work"
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    extractor = make_extractor(workspace, "cid", scratch)
+    video = extractor.workspace_dir / "show" / "ep1.mp4"
+    outputs = [extractor.workspace_dir / "ep1.wav", tmp_path / "elsewhere.m4a"]
+
+    call = extractor._ffmpeg_prefix([video], outputs)
+
+    job = call.job_dir.name
+    assert call.job_dir.parent == scratch
+    assert call.argv == [
+        "podman",
+        "exec",
+        "cid",
+        "sh",
+        "-c",
+        _PID_FILE_WRAPPER,
+        f"/scratch/{job}/ffmpeg.pid",
+    ]
+    assert call.paths == {
+        video: "/work/show/ep1.mp4",
+        outputs[0]: f"/scratch/{job}/0.wav",
+        outputs[1]: f"/scratch/{job}/1.m4a",
+    }
+    assert call.staged == {
+        outputs[0]: call.job_dir / "0.wav",
+        outputs[1]: call.job_dir / "1.m4a",
+    }
+
+    # Written outputs are moved into place; missing ones are left to the caller
+    call.staged[outputs[0]].write_bytes(b"audio")
+    outputs[0].parent.mkdir()
+    _publish_staged(call)
+    assert outputs[0].read_bytes() == b"audio"
+    assert not outputs[1].exists()
+
+
+def test_ffmpeg_prefix_mounts_inputs_outside_the_workspace(tmp_path):
+    extractor = make_extractor(tmp_path / "work", "cid", tmp_path / "scratch")
+    video = tmp_path / "videos" / "ep1.mp4"
+    output = tmp_path / "out" / "ep1.wav"
+
+    call = extractor._ffmpeg_prefix([video], [output])
+
+    assert call.argv == [
+        "podman",
+        "run",
+        "--rm",
+        "-v",
+        f"{_to_mount_path(video.parent)}:/mnt/0:ro",
+        "-v",
+        f"{_to_mount_path(output.parent)}:/mnt/1",
+        "ffmpeg-image",
+    ]
+    assert call.paths == {video: "/mnt/0/ep1.mp4", output: "/mnt/1/ep1.wav"}
+    assert call.job_dir is None
+    assert call.staged is None
+
+
+def test_container_dir_maps_directories_under_the_workspace():
+    workspace = Path("/srv/media")
+
+    assert _container_dir(workspace, workspace, "/work") == "/work"
+    assert _container_dir(workspace / "a" / "b", workspace, "/work") == "/work/a/b"
+    assert _container_dir(Path("/srv/other"), workspace, "/work") is None
+    # A sibling sharing the workspace's name as a prefix is still outside it
+    assert _container_dir(Path("/srv/media2"), workspace, "/work") is None
@@ -0,0 +1,236 @@
+"""
+Tests for the timeline, byte-offset, WAV and subtitle helpers in
+audio_transcriber, run on synthetic audio
+"""
+
+import array
+import io
+import struct
+import sys
+import wave
+
+import httpx
+
+from audio_transcriber import (
+    SAMPLE_RATE,
+    Word,
+    _chunk_bounds,
+    _merge_chunks,
+    _timestamp,
+    _WavStream,
+    build_cues,
+    find_speech,
+    is_oversized_pcm_wav,
+    remove_silence,
+    restore_timeline,
+)
+
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+
+def make_pcm(segments: list[tuple[int, int]]) -> bytes:
+    """Build PCM from (duration ms, peak amplitude) segments of square wave."""
+    samples = array.array("h")
+    for duration_ms, amplitude in segments:
+        count = SAMPLE_RATE * duration_ms // 1000
+        samples.extend(amplitude if i % 2 else -amplitude for i in range(count))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def test_chunk_bounds_overlap_into_next_window():
+    bounds = _chunk_bounds(10 * BYTES_PER_SECOND, 4, 1)
+    assert bounds == [
+        (0, 5 * BYTES_PER_SECOND),
+        (4 * BYTES_PER_SECOND, 9 * BYTES_PER_SECOND),
+        (8 * BYTES_PER_SECOND, 10 * BYTES_PER_SECOND),
+    ]
+
+
+def test_chunk_bounds_last_window_absorbs_short_tail():
+    # The second window's overlap already reaches the end, so no third
+    # window holding only overlap is created
+    bounds = _chunk_bounds(9 * BYTES_PER_SECOND, 4, 1)
+    assert bounds == [
+        (0, 5 * BYTES_PER_SECOND),
+        (4 * BYTES_PER_SECOND, 9 * BYTES_PER_SECOND),
+    ]
+
+
+def test_merge_chunks_keeps_each_overlap_word_once():
+    # Chunks start at 0s and 4s and share 4s-5s; the cut is at 4.5s
+    first = [Word(1000, 1400, "a"), Word(4200, 4400, "b1"), Word(4700, 4900, "c1")]
+    second = [Word(4200, 4400, "b2"), Word(4700, 4900, "c2"), Word(6000, 6300, "d")]
+
+    merged = _merge_chunks([(0, first), (4000, second)], overlap_ms=1000)
+
+    assert [w.text for w in merged] == ["a", "b1", "c2", "d"]
+
+
+def test_merge_chunks_cut_is_inclusive_on_the_later_chunk():
+    first = [Word(4499, 4600, "early"), Word(4500, 4600, "dropped")]
+    second = [Word(4499, 4600, "dropped"), Word(4500, 4600, "late")]
+
+    merged = _merge_chunks([(0, first), (4000, second)], overlap_ms=1000)
+
+    assert [w.text for w in merged] == ["early", "late"]
+
+
+def test_find_speech_pads_sounding_spans():
+    pcm = make_pcm([(1000, 8000), (3000, 0), (1000, 8000)])
+
+    spans = find_speech(pcm, padding_ms=250)
+
+    assert spans == [(0, 1250), (3750, 5000)]
+
+
+def test_find_speech_bridges_short_pauses():
+    pcm = make_pcm([(1000, 8000), (300, 0), (1000, 8000)])
+
+    assert find_speech(pcm, padding_ms=100) == [(0, 2300)]
+
+
+def test_remove_silence_and_restore_timeline_across_cuts():
+    pcm = make_pcm([(1000, 8000), (3000, 0), (1000, 8000)])
+    spans = find_speech(pcm, padding_ms=250)
+
+    speech, offsets = remove_silence(pcm, spans)
+
+    assert len(speech) == 2500 * BYTES_PER_SECOND // 1000
+    assert offsets == [(0, 0), (1250, 3750)]
+    # The kept audio is the original audio of each span
+    assert (
+        speech[1250 * BYTES_PER_SECOND // 1000 :]
+        == pcm[3750 * BYTES_PER_SECOND // 1000 :]
+    )
+
+    words = [
+        Word(200, 600, "first"),
+        Word(1100, 1400, "across"),  # Starts before the cut, ends after it
+        Word(1500, 1800, "second"),
+    ]
+    assert restore_timeline(words, offsets) == [
+        Word(200, 600, "first"),
+        Word(1100, 1400, "across"),
+        Word(4000, 4300, "second"),
+    ]
+
+
+def test_restore_timeline_without_cuts_is_identity():
+    words = [Word(0, 100, "a")]
+    assert restore_timeline(words, []) is words
+
+
+def test_wav_stream_is_a_valid_wav_of_the_pcm():
+    pcm = make_pcm([(500, 1000)])
+
+    data = _WavStream(pcm).read()
+
+    with wave.open(io.BytesIO(data)) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert wav.getframerate() == SAMPLE_RATE
+        assert wav.getnframes() == len(pcm) // 2
+        assert wav.readframes(wav.getnframes()) == pcm
+
+
+def test_wav_stream_reads_across_the_header_boundary():
+    pcm = bytes(range(16))
+    stream = _WavStream(pcm)
+    expected = stream.read()
+
+    # A raw read may stop at the end of the header; a buffered one may not
+    stream.seek(40)
+    assert io.BufferedReader(stream).read(8) == expected[40:48]
+    assert stream.seek(-4, io.SEEK_END) == len(expected) - 4
+    assert stream.read() == pcm[-4:]
+
+
+def test_wav_stream_upload_has_content_length():
+    pcm = make_pcm([(250, 1000)])
+
+    request = httpx.Request(
+        "POST", "https://example.com/v2/upload", content=_WavStream(pcm)
+    )
+
+    assert request.headers["Content-Length"] == str(44 + len(pcm))
+
+
+def write_wav_header(
+    path, audio_format: int, channels: int, sample_rate: int, bits: int
+) -> str:
+    """Write a RIFF/WAVE file holding just a fmt chunk with these fields."""
+    block_align = channels * bits // 8
+    fmt = struct.pack(
+        "<HHIIHH",
+        audio_format,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits,
+    )
+    path.write_bytes(b"RIFF\x00\x00\x00\x00WAVEfmt \x10\x00\x00\x00" + fmt)
+    return str(path)
+
+
+def test_is_oversized_pcm_wav_only_for_uncompressed_audio_above_speech_format(
+    tmp_path,
+):
+    def check(audio_format, channels, sample_rate, bits):
+        path = write_wav_header(
+            tmp_path / "audio.wav", audio_format, channels, sample_rate, bits
+        )
+        return is_oversized_pcm_wav(path)
+
+    assert check(1, 2, 44100, 16)  # CD audio
+    assert check(1, 1, SAMPLE_RATE, 24)
+    assert check(3, 1, SAMPLE_RATE, 32)  # IEEE float
+    assert check(0xFFFE, 6, 48000, 24)  # Extensible
+    assert not check(1, 1, SAMPLE_RATE, 16)  # Already speech format
+    assert not check(0x55, 2, 44100, 16)  # MP3 in a WAV container
+
+
+def test_is_oversized_pcm_wav_ignores_other_and_missing_files(tmp_path):
+    flac = tmp_path / "audio.flac"
+    flac.write_bytes(b"fLaC" + bytes(60))
+
+    assert not is_oversized_pcm_wav(str(flac))
+    assert not is_oversized_pcm_wav(str(tmp_path / "missing.wav"))
+
+
+def test_timestamp_formats_hours_past_the_clock_table():
+    assert _timestamp(0, ",") == "00:00:00,000"
+    assert _timestamp(3_599_999, ",") == "00:59:59,999"
+    assert _timestamp(3_600_000 + 62_005, ".") == "01:01:02.005"
+    assert _timestamp(100 * 3_600_000, ",") == "100:00:00,000"
+
+
+def test_build_cues_splits_on_length_pause_and_duration():
+    words = [
+        Word(0, 400, "hello"),
+        Word(500, 900, "there"),
+        Word(1000, 1400, "friend"),  # "hello there friend" exceeds 16 chars
+        Word(3000, 3400, "after"),  # Follows a 1.6s pause
+        Word(3500, 9000, "long"),
+        Word(9100, 10500, "tail"),  # Would keep the cue up past 7s
+    ]
+
+    cues = build_cues(words, chars_per_caption=16)
+
+    assert cues == [
+        (0, 900, "hello there"),
+        (1000, 1400, "friend"),
+        (3000, 9000, "after long"),
+        (9100, 10500, "tail"),
+    ]
+
+
+def test_build_cues_joins_words_with_the_separator():
+    words = [Word(0, 100, "안녕"), Word(100, 200, "하세요")]
+
+    assert build_cues(words, chars_per_caption=5, separator="") == [
+        (0, 200, "안녕하세요")
+    ]
+    assert build_cues([]) == []
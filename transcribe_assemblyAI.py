@@ -1,11 +1,58 @@
 # Install the assemblyai package by executing the command "pip install assemblyai"
 
+import sys
+from concurrent.futures import as_completed
+from pathlib import Path
+
 import assemblyai as aai
 
-aai.settings.api_key = "ASSEMBLYAI_API_KEY"
-aai.settings.base_url = "https://api.eu.assemblyai.com"
+from config import DEFAULT_AUDIO_FILE, OUTPUT_DIR, settings
+
+# Read the API key and endpoint from the environment (or .env)
+settings()
+
+
+def save_subtitles(transcript: aai.Transcript, fmt: str, path: str) -> None:
+    """
+    Download a transcript's subtitle export ("srt" or "vtt") straight to a
+    file, chunk by chunk, instead of holding the whole document in memory.
+    """
+    client = aai.Client.get_default()
+    with client.http_client.stream(
+        "GET", f"/v2/transcript/{transcript.id}/{fmt}"
+    ) as response:
+        if response.is_error:
+            response.read()
+            raise RuntimeError(
+                f"Failed to export {fmt.upper()} for transcript {transcript.id}: "
+                f"{response.text}"
+            )
+        with open(path, "wb") as f:
+            for chunk in response.iter_bytes():
+                f.write(chunk)
 
-audio_file = "output/output.wav"
+
+# Audio files to transcribe; defaults to the extractor's output
+audio_files = sys.argv[1:] or [DEFAULT_AUDIO_FILE]
+
+# A single file keeps the historical output names; batches are named per file
+if len(audio_files) == 1:
+    stems = {audio_files[0]: "subtitles"}
+else:
+    stems = {path: Path(path).stem for path in audio_files}
+    # Inputs sharing a stem (a/ep1.wav, b/ep1.wav) would overwrite each
+    # other's subtitles; refuse before anything is uploaded
+    clashes = {}
+    for path in audio_files:
+        clashes.setdefault(stems[path], []).append(path)
+    clashes = {stem: paths for stem, paths in clashes.items() if len(paths) > 1}
+    if clashes:
+        for stem, paths in clashes.items():
+            print(
+                f"Error: {', '.join(paths)} would all be saved as {stem}.srt/.vtt",
+                file=sys.stderr,
+            )
+        sys.exit(2)
 
 # Optimized configuration for Korean TV show audio with background music
 config = aai.TranscriptionConfig(
@@ -27,34 +74,51 @@ config = aai.TranscriptionConfig(
 )
 
 transcriber = aai.Transcriber(config=config)
-transcript = transcriber.transcribe(audio_file)
 
-if transcript.status == "error":
-    raise RuntimeError(f"Transcription failed: {transcript.error}")
+# Submit every file up front so they are transcribed concurrently, then
+# handle the results in whichever order they finish
+futures = {transcriber.transcribe_async(path): path for path in audio_files}
 
+generated = []
+failed = []
+for future in as_completed(futures):
+    audio_file = futures[future]
+    srt_path = f"{OUTPUT_DIR}/{stems[audio_file]}.srt"
+    vtt_path = f"{OUTPUT_DIR}/{stems[audio_file]}.vtt"
 
-# Generate and save SRT subtitles
-print("\n" + "=" * 50)
-print("GENERATING SRT SUBTITLES...")
-print("=" * 50)
-srt_content = transcript.export_subtitles_srt()
-with open("output/subtitles.srt", "w", encoding="utf-8") as f:
-    f.write(srt_content)
-print("✓ SRT subtitles saved to: output/subtitles.srt")
+    print("\n" + "=" * 50)
+    print(f"GENERATING SUBTITLES FOR {audio_file}...")
+    print("=" * 50)
 
-# Generate and save VTT subtitles (WebVTT format)
-print("\n" + "=" * 50)
-print("GENERATING VTT SUBTITLES...")
-print("=" * 50)
-vtt_content = transcript.export_subtitles_vtt()
-with open("output/subtitles.vtt", "w", encoding="utf-8") as f:
-    f.write(vtt_content)
-print("✓ VTT subtitles saved to: output/subtitles.vtt")
+    # One failed file is reported and the rest of the batch carries on
+    try:
+        transcript = future.result()
+        if transcript.status == "error":
+            raise RuntimeError(f"Transcription failed: {transcript.error}")
+
+        # Generate and save SRT subtitles
+        save_subtitles(transcript, "srt", srt_path)
+        print(f"✓ SRT subtitles saved to: {srt_path}")
+        generated.append((srt_path, "SRT format"))
+
+        # Generate and save VTT subtitles (WebVTT format)
+        save_subtitles(transcript, "vtt", vtt_path)
+        print(f"✓ VTT subtitles saved to: {vtt_path}")
+        generated.append((vtt_path, "WebVTT format"))
+    except Exception as e:
+        print(f"✗ {audio_file}: {e}", file=sys.stderr)
+        failed.append(audio_file)
 
 
 print("\n" + "=" * 50)
 print("PROCESSING COMPLETE!")
 print("=" * 50)
 print("Files generated:")
-print("• output/subtitles.srt (SRT format)")
-print("• output/subtitles.vtt (WebVTT format)")
+for path, kind in generated:
+    print(f"• {path} ({kind})")
+
+if failed:
+    print(f"\n{len(failed)} of {len(audio_files)} file(s) failed:", file=sys.stderr)
+    for path in failed:
+        print(f"• {path}", file=sys.stderr)
+    sys.exit(1)
@@ -1,67 +1,569 @@
+import argparse
+import asyncio
+import concurrent.futures
+import logging
 import os
+import threading
+from collections import OrderedDict
+from typing import Literal
 import assemblyai as aai
 from fastmcp import FastMCP
 
+from audio_extractor import AudioExtractor
+from audio_transcriber import (
+    TranscriptCache,
+    Word,
+    audio_digest,
+    build_cues,
+    find_speech,
+    is_oversized_pcm_wav,
+    release_page_cache,
+    remove_silence,
+    restore_timeline,
+    run_blocking,
+    to_srt,
+    to_vtt,
+    transcribe_chunked,
+    transcribe_pcm,
+    transcript_words,
+    word_separator,
+)
+from config import settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 # Initialize FastMCP server
 mcp = FastMCP(
     name="Audio Transcription Server",
     instructions="""
     This server provides audio transcription capabilities using AssemblyAI.
-    Call transcribe_audio_to_srt() with a local audio file path to get SRT subtitles.
+    Call transcribe_audio_to_srt() with a local audio file path to get SRT subtitles,
+    or transcribe_audio() to get SRT and VTT from a single transcription.
     The server is optimized for Korean content but can handle other languages too.
     """,
 )
 
-# Configure AssemblyAI settings
-aai.settings.api_key = "API_KEY"
-aai.settings.base_url = "https://api.eu.assemblyai.com"
+# One transcriber per language code, created on first use
+_TRANSCRIBERS: dict[str, aai.Transcriber] = {}
+
+
+def _make_config(language_code: str) -> aai.TranscriptionConfig:
+    """Build the transcription configuration for a language."""
+    # Optimized configuration for audio with background music
+    return aai.TranscriptionConfig(
+        # Use the best speech model for highest accuracy
+        speech_model=aai.SpeechModel.best,
+        # Set language
+        language_code=language_code,
+        # Enable speaker labels to distinguish different speakers
+        speaker_labels=True,
+        # Enable punctuation and formatting for better readability
+        punctuate=True,
+        format_text=True,
+    )
+
+
+def _get_transcriber(language_code: str) -> aai.Transcriber:
+    """
+    Return the shared transcriber for a language, creating it on first use.
+
+    Raises:
+        RuntimeError: If the AssemblyAI API key is not configured
+    """
+    transcriber = _TRANSCRIBERS.get(language_code)
+    if transcriber is None:
+        # Configures the SDK on the first transcription, not at import
+        settings()
+        transcriber = _TRANSCRIBERS.setdefault(
+            language_code, aai.Transcriber(config=_make_config(language_code))
+        )
+    return transcriber
+
+
+# Transcription results keyed by audio content, shared by every output format
+transcript_cache = TranscriptCache()
+
+# Results of recently transcribed audio, keyed like transcript_cache: the
+# provider's transcript id and exported subtitles, or locally built cues
+MAX_CACHED_RESULTS = 8
+cached_results: OrderedDict[tuple[str, str], dict] = OrderedDict()
+
+# Results being loaded or transcribed, keyed like cached_results, so
+# concurrent requests for the same audio wait on a single transcription;
+# subtitle formats being exported for a cached transcript are keyed by
+# (digest, variant, format)
+transcriptions_in_flight: dict[tuple[str, ...], asyncio.Task] = {}
+
+# Subtitle formats the tools can return, with how to render each from cues
+# built locally
+SUBTITLE_FORMATS = {"srt": to_srt, "vtt": to_vtt}
+
+# Files transcribed at once by transcribe_audio_batch
+MAX_CONCURRENT_TRANSCRIPTIONS = 8
+
+# Chunks of one file transcribed at once with parallel_chunks
+MAX_CONCURRENT_CHUNKS = 5
+
+# Blocking SDK calls hold a thread for a whole upload and poll, so they get
+# their own pool; the loop's default executor stays free for short file
+# operations (cache lookups, hashing, header reads)
+sdk_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_TRANSCRIPTIONS * MAX_CONCURRENT_CHUNKS,
+    thread_name_prefix="assemblyai",
+)
+
+# Decodes audio for chunked transcription; created on first use
+audio_extractor = None
+audio_extractor_lock = threading.Lock()
+
+# Host directory mounted into the extractor's FFmpeg container (override with
+# --workspace); None uses the working directory
+workspace_dir: str | None = None
+
+
+def _get_audio_extractor() -> AudioExtractor:
+    """Return the shared AudioExtractor, creating it on first use."""
+    global audio_extractor
+    with audio_extractor_lock:
+        if audio_extractor is None:
+            audio_extractor = AudioExtractor(workspace_dir=workspace_dir)
+        return audio_extractor
+
+
+async def _decode_pcm(audio_file_path: str, required: bool) -> bytearray | None:
+    """
+    Decode audio to 16kHz mono PCM with FFmpeg.
+
+    Args:
+        audio_file_path: Audio file to decode
+        required: Raise if decoding fails, rather than returning None so the
+            caller can fall back to uploading the original file
+
+    Raises:
+        RuntimeError: If required and FFmpeg is unavailable or decoding fails
+    """
+    try:
+        extractor = await asyncio.to_thread(_get_audio_extractor)
+    except RuntimeError as e:
+        if required:
+            raise
+        logger.warning("Uploading audio without preprocessing: %s", e)
+        return None
+
+    pcm = await extractor.extract_s16_mono_16k_async(audio_file_path)
+    if pcm is None and required:
+        raise RuntimeError(f"Failed to decode audio: {audio_file_path}")
+    return pcm
+
+
+async def _export_subtitles(transcript: aai.Transcript, formats: list[str]) -> dict:
+    """Export a provider transcript's subtitles in each format, concurrently."""
+    contents = await asyncio.gather(
+        *(
+            run_blocking(sdk_executor, getattr(transcript, f"export_subtitles_{fmt}"))
+            for fmt in formats
+        )
+    )
+    return dict(zip(formats, contents))
+
+
+async def _transcribe(
+    audio_file_path: str,
+    language_code: str,
+    formats: list[str],
+    parallel_chunks: bool,
+    preprocess: bool,
+    skip_silence: bool,
+) -> dict:
+    """
+    Transcribe an audio file with the provider.
+
+    A whole-file transcription keeps AssemblyAI's own subtitle export: the
+    result holds the transcript id and the requested formats as exported.
+    Chunked or silence-skipped audio is never transcribed whole, so its
+    result holds the words on the original timeline, to be rendered locally.
+    """
+    # Reuse the transcriber for this language; the SDK blocks while it
+    # uploads and polls, so run it on sdk_executor to keep the loop free
+    transcriber = _get_transcriber(language_code)
+
+    # Decode uncompressed WAVs above 16kHz mono 16-bit to that format, so
+    # only what the model uses is uploaded; compressed files are smaller as
+    # they are. Chunking and silence skipping always work on decoded PCM
+    local = parallel_chunks or skip_silence
+    pcm = None
+    if local or (
+        preprocess and await asyncio.to_thread(is_oversized_pcm_wav, audio_file_path)
+    ):
+        pcm = await _decode_pcm(audio_file_path, required=local)
+
+    if not local:
+        if pcm is not None:
+            transcript = await transcribe_pcm(transcriber, pcm, sdk_executor)
+        else:
+            transcript = await run_blocking(
+                sdk_executor, transcriber.transcribe, audio_file_path
+            )
+
+            # Check for transcription errors
+            if transcript.status == "error":
+                raise RuntimeError(f"Transcription failed: {transcript.error}")
+        return {
+            "transcript_id": transcript.id,
+            "subtitles": await _export_subtitles(transcript, formats),
+        }
+
+    # Upload only the sounding parts; offsets map the words back afterwards
+    offsets = None
+    if skip_silence:
+        total_bytes = len(pcm)
+        spans = await asyncio.to_thread(find_speech, pcm)
+        pcm, offsets = await asyncio.to_thread(remove_silence, pcm, spans)
+        logger.info("Skipping silence: uploading %d of %d bytes", len(pcm), total_bytes)
+        if not pcm:
+            return {"words": []}
+
+    if parallel_chunks:
+        words = await transcribe_chunked(
+            transcriber,
+            pcm,
+            max_concurrency=MAX_CONCURRENT_CHUNKS,
+            executor=sdk_executor,
+        )
+    else:
+        words = transcript_words(await transcribe_pcm(transcriber, pcm, sdk_executor))
+    if offsets is not None:
+        words = restore_timeline(words, offsets)
+    return {"words": words}
+
+
+def _cache_result(key: tuple[str, str], result: dict) -> None:
+    """Keep a result in memory, evicting the least recently used."""
+    cached_results[key] = result
+    cached_results.move_to_end(key)
+    if len(cached_results) > MAX_CACHED_RESULTS:
+        cached_results.popitem(last=False)
+
+
+def _has_content(entry: dict) -> bool:
+    """Whether a result holds any words or non-empty subtitles."""
+    return bool(entry.get("words")) or any(entry.get("subtitles", {}).values())
+
+
+async def _load_result(
+    audio_file_path: str,
+    key: tuple[str, str],
+    language_code: str,
+    formats: list[str],
+    parallel_chunks: bool,
+    preprocess: bool,
+    skip_silence: bool,
+) -> dict:
+    """
+    Load a result from the on-disk cache, or transcribe the audio, and keep
+    it in memory.
+
+    Empty results aren't cached, so audio that produced nothing is
+    transcribed again on the next request.
+    """
+    digest, variant = key
+    entry = await asyncio.to_thread(transcript_cache.get, digest, variant)
+    if entry is None:
+        entry = await _transcribe(
+            audio_file_path,
+            language_code,
+            formats,
+            parallel_chunks,
+            preprocess,
+            skip_silence,
+        )
+        if _has_content(entry):
+            await asyncio.to_thread(transcript_cache.put, digest, variant, entry)
+    # The audio has been hashed and uploaded; it won't be read again
+    await asyncio.to_thread(release_page_cache, audio_file_path)
+
+    if parallel_chunks or skip_silence:
+        words = [Word(*w) for w in entry["words"]]
+        result = {"cues": build_cues(words, separator=word_separator(language_code))}
+    else:
+        result = entry
+    if _has_content(entry):
+        _cache_result(key, result)
+    return result
+
+
+async def _export_formats(
+    key: tuple[str, str], transcript_id: str, formats: list[str]
+) -> dict[str, str]:
+    """
+    Export subtitle formats a cached provider transcript lacks, and add them
+    to its cached result.
+
+    Cached results may be serialized in a worker thread at any time, so the
+    result is replaced by an updated copy rather than changed in place.
+
+    Returns:
+        The exported subtitles keyed by format
+    """
+    settings()
+    transcript = await run_blocking(
+        sdk_executor, aai.Transcript.get_by_id, transcript_id
+    )
+    exported = await _export_subtitles(transcript, formats)
+
+    latest = cached_results.get(key)
+    if latest is None or latest.get("transcript_id") != transcript_id:
+        latest = {"transcript_id": transcript_id, "subtitles": {}}
+    updated = {**latest, "subtitles": {**latest["subtitles"], **exported}}
+    if _has_content(updated):
+        _cache_result(key, updated)
+        await asyncio.to_thread(transcript_cache.put, *key, updated)
+    return exported
+
+
+async def _transcribe_subtitles(
+    audio_file_path: str,
+    language_code: str,
+    formats: list[str],
+    parallel_chunks: bool,
+    preprocess: bool,
+    skip_silence: bool,
+) -> dict[str, str]:
+    """
+    Transcribe an audio file once and return it in each requested format.
+
+    Results come from the on-disk transcript cache when identical audio was
+    already transcribed with the same settings, and are kept in memory for
+    the most recent files. Concurrent requests for the same audio and
+    settings share one transcription. A format the provider hasn't exported
+    yet for a cached transcript is exported from its transcript id, without
+    transcribing again, and only once however many requests are missing it.
+
+    Raises:
+        FileNotFoundError: If the audio file doesn't exist
+        RuntimeError: If transcription fails or produces no content
+    """
+    # Validate that the audio file exists; the stat is reused for the digest
+    try:
+        audio_stat = os.stat(audio_file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Audio file not found: {audio_file_path}") from None
+
+    digest = await asyncio.to_thread(audio_digest, audio_file_path, audio_stat)
+    local = parallel_chunks or skip_silence
+    # Preprocessing changes the audio uploaded for a whole-file export, so
+    # it is part of the key there; chunked and silence-skipped audio is
+    # always decoded, whatever preprocess says
+    variant = (
+        f"best-{language_code}"
+        + ("-chunked" if parallel_chunks else "")
+        + ("-speech" if skip_silence else "")
+        + ("" if local else "-export")
+        + ("" if local or preprocess else "-raw")
+    )
+    key = (digest, variant)
+    result = cached_results.get(key)
+    if result is not None:
+        cached_results.move_to_end(key)
+    else:
+        task = transcriptions_in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                _load_result(
+                    audio_file_path,
+                    key,
+                    language_code,
+                    formats,
+                    parallel_chunks,
+                    preprocess,
+                    skip_silence,
+                )
+            )
+            transcriptions_in_flight[key] = task
+            task.add_done_callback(lambda _: transcriptions_in_flight.pop(key, None))
+        # Shielded so a cancelled request doesn't cancel the others waiting
+        result = await asyncio.shield(task)
+
+    if local:
+        if not result["cues"]:
+            raise RuntimeError("No transcription content generated")
+        return {fmt: SUBTITLE_FORMATS[fmt](result["cues"]) for fmt in formats}
+
+    subtitles = result["subtitles"]
+    missing = [fmt for fmt in formats if fmt not in subtitles]
+    if missing:
+        # Export the formats nobody is exporting yet in one task, then wait
+        # for every export this request needs
+        new = [fmt for fmt in missing if (*key, fmt) not in transcriptions_in_flight]
+        if new:
+            task = asyncio.create_task(
+                _export_formats(key, result["transcript_id"], new)
+            )
+            for fmt in new:
+                export_key = (*key, fmt)
+                transcriptions_in_flight[export_key] = task
+                task.add_done_callback(
+                    lambda _, k=export_key: transcriptions_in_flight.pop(k, None)
+                )
+        tasks = {transcriptions_in_flight[(*key, fmt)] for fmt in missing}
+        # Shielded so a cancelled request doesn't cancel the others waiting
+        exports = await asyncio.shield(asyncio.gather(*tasks))
+        subtitles = {**subtitles}
+        for exported in exports:
+            subtitles.update(exported)
+    if not all(subtitles[fmt] for fmt in formats):
+        raise RuntimeError("No transcription content generated")
+    return {fmt: subtitles[fmt] for fmt in formats}
 
 
 @mcp.tool()
-def transcribe_audio_to_srt(audio_file_path: str, language_code: str = "ko") -> str:
+async def transcribe_audio(
+    audio_file_path: str,
+    language_code: str = "ko",
+    formats: list[Literal["srt", "vtt"]] | None = None,
+    parallel_chunks: bool = False,
+    preprocess: bool = True,
+    skip_silence: bool = False,
+) -> dict:
     """
-    Transcribe a local audio file and return SRT subtitle content.
+    Transcribe a local audio file once and return subtitles in several formats.
 
     Args:
         audio_file_path (str): Path to the local audio file to transcribe
         language_code (str): Language code for transcription (default: "ko" for Korean)
+        formats (list[str]): Subtitle formats to return (default: ["srt", "vtt"])
+        parallel_chunks (bool): Split long audio into 5-minute chunks that are
+            transcribed concurrently (default: False)
+        preprocess (bool): Downmix and resample uncompressed WAV audio to
+            16kHz mono with FFmpeg before uploading (default: True)
+        skip_silence (bool): Cut silences of a second or more before
+            uploading; subtitle times still match the original audio
+            (default: False)
 
     Returns:
-        str: SRT subtitle content
+        dict: Subtitle content keyed by format, or an "error" message
     """
     try:
-        # Validate that the audio file exists
-        if not os.path.exists(audio_file_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-
-        # Optimized configuration for audio with background music
-        config = aai.TranscriptionConfig(
-            # Use the best speech model for highest accuracy
-            speech_model=aai.SpeechModel.best,
-            # Set language
-            language_code=language_code,
-            # Enable speaker labels to distinguish different speakers
-            speaker_labels=True,
-            # Enable punctuation and formatting for better readability
-            punctuate=True,
-            format_text=True,
+        return await _transcribe_subtitles(
+            audio_file_path,
+            language_code,
+            formats or list(SUBTITLE_FORMATS),
+            parallel_chunks,
+            preprocess,
+            skip_silence,
         )
 
-        # Create transcriber and transcribe
-        transcriber = aai.Transcriber(config=config)
-        transcript = transcriber.transcribe(audio_file_path)
+    except FileNotFoundError as e:
+        return {"error": f"Error: {str(e)}"}
+    except RuntimeError as e:
+        return {"error": f"Transcription Error: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Unexpected Error: {str(e)}"}
 
-        # Check for transcription errors
-        if transcript.status == "error":
-            raise RuntimeError(f"Transcription failed: {transcript.error}")
 
-        # Generate SRT content
-        srt_content = transcript.export_subtitles_srt()
+@mcp.tool()
+async def transcribe_audio_batch(
+    audio_file_paths: list[str],
+    language_code: str = "ko",
+    formats: list[Literal["srt", "vtt"]] | None = None,
+    parallel_chunks: bool = False,
+    preprocess: bool = True,
+    skip_silence: bool = False,
+) -> dict:
+    """
+    Transcribe several local audio files concurrently and return subtitles
+    for each.
 
-        if not srt_content:
-            raise RuntimeError("No transcription content generated")
+    Up to MAX_CONCURRENT_TRANSCRIPTIONS files are in flight at once, sharing
+    the SDK's keep-alive connection pool; a failure affects only its file.
+
+    Args:
+        audio_file_paths (list[str]): Paths to the local audio files to transcribe
+        language_code (str): Language code for transcription (default: "ko" for Korean)
+        formats (list[str]): Subtitle formats to return (default: ["srt", "vtt"])
+        parallel_chunks (bool): Split long audio into 5-minute chunks that are
+            transcribed concurrently (default: False)
+        preprocess (bool): Downmix and resample uncompressed WAV audio to
+            16kHz mono with FFmpeg before uploading (default: True)
+        skip_silence (bool): Cut silences of a second or more before
+            uploading; subtitle times still match the original audio
+            (default: False)
+
+    Returns:
+        dict: Per-file results in input order, each with subtitle content
+        keyed by format or an "error" message
+    """
+    formats = formats or list(SUBTITLE_FORMATS)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+
+    async def transcribe_one(audio_file_path: str) -> dict:
+        result = {"audio_file_path": audio_file_path}
+        try:
+            async with semaphore:
+                result.update(
+                    await _transcribe_subtitles(
+                        audio_file_path,
+                        language_code,
+                        formats,
+                        parallel_chunks,
+                        preprocess,
+                        skip_silence,
+                    )
+                )
+        except FileNotFoundError as e:
+            result["error"] = f"Error: {str(e)}"
+        except RuntimeError as e:
+            result["error"] = f"Transcription Error: {str(e)}"
+        except Exception as e:
+            result["error"] = f"Unexpected Error: {str(e)}"
+        return result
+
+    results = await asyncio.gather(*(transcribe_one(p) for p in audio_file_paths))
+    return {
+        "success": all("error" not in r for r in results),
+        "results": results,
+    }
 
-        return srt_content
+
+@mcp.tool()
+async def transcribe_audio_to_srt(
+    audio_file_path: str,
+    language_code: str = "ko",
+    parallel_chunks: bool = False,
+    preprocess: bool = True,
+    skip_silence: bool = False,
+) -> str:
+    """
+    Transcribe a local audio file and return SRT subtitle content.
+
+    Args:
+        audio_file_path (str): Path to the local audio file to transcribe
+        language_code (str): Language code for transcription (default: "ko" for Korean)
+        parallel_chunks (bool): Split long audio into 5-minute chunks that are
+            transcribed concurrently (default: False)
+        preprocess (bool): Downmix and resample uncompressed WAV audio to
+            16kHz mono with FFmpeg before uploading (default: True)
+        skip_silence (bool): Cut silences of a second or more before
+            uploading; subtitle times still match the original audio
+            (default: False)
+
+    Returns:
+        str: SRT subtitle content
+    """
+    try:
+        subtitles = await _transcribe_subtitles(
+            audio_file_path,
+            language_code,
+            ["srt"],
+            parallel_chunks,
+            preprocess,
+            skip_silence,
+        )
+        return subtitles["srt"]
 
     except FileNotFoundError as e:
         return f"Error: {str(e)}"
@@ -72,50 +574,40 @@ def transcribe_audio_to_srt(audio_file_path: str, language_code: str = "ko") ->
 
 
 @mcp.tool()
-def transcribe_audio_to_vtt(audio_file_path: str, language_code: str = "ko") -> str:
+async def transcribe_audio_to_vtt(
+    audio_file_path: str,
+    language_code: str = "ko",
+    parallel_chunks: bool = False,
+    preprocess: bool = True,
+    skip_silence: bool = False,
+) -> str:
     """
     Transcribe a local audio file and return VTT subtitle content.
 
     Args:
         audio_file_path (str): Path to the local audio file to transcribe
         language_code (str): Language code for transcription (default: "ko" for Korean)
+        parallel_chunks (bool): Split long audio into 5-minute chunks that are
+            transcribed concurrently (default: False)
+        preprocess (bool): Downmix and resample uncompressed WAV audio to
+            16kHz mono with FFmpeg before uploading (default: True)
+        skip_silence (bool): Cut silences of a second or more before
+            uploading; subtitle times still match the original audio
+            (default: False)
 
     Returns:
         str: VTT subtitle content
     """
     try:
-        # Validate that the audio file exists
-        if not os.path.exists(audio_file_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-
-        # Optimized configuration for audio with background music
-        config = aai.TranscriptionConfig(
-            # Use the best speech model for highest accuracy
-            speech_model=aai.SpeechModel.best,
-            # Set language
-            language_code=language_code,
-            # Enable speaker labels to distinguish different speakers
-            speaker_labels=True,
-            # Enable punctuation and formatting for better readability
-            punctuate=True,
-            format_text=True,
+        subtitles = await _transcribe_subtitles(
+            audio_file_path,
+            language_code,
+            ["vtt"],
+            parallel_chunks,
+            preprocess,
+            skip_silence,
         )
-
-        # Create transcriber and transcribe
-        transcriber = aai.Transcriber(config=config)
-        transcript = transcriber.transcribe(audio_file_path)
-
-        # Check for transcription errors
-        if transcript.status == "error":
-            raise RuntimeError(f"Transcription failed: {transcript.error}")
-
-        # Generate VTT content
-        vtt_content = transcript.export_subtitles_vtt()
-
-        if not vtt_content:
-            raise RuntimeError("No transcription content generated")
-
-        return vtt_content
+        return subtitles["vtt"]
 
     except FileNotFoundError as e:
         return f"Error: {str(e)}"
@@ -126,7 +618,7 @@ def transcribe_audio_to_vtt(audio_file_path: str, language_code: str = "ko") ->
 
 
 @mcp.tool()
-def get_supported_languages() -> list[str]:
+async def get_supported_languages() -> list[str]:
     """
     Get a list of commonly supported language codes for transcription.
 
@@ -142,4 +634,21 @@ def get_supported_languages() -> list[str]:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audio Transcription MCP Server")
+    parser.add_argument(
+        "--workspace",
+        help="Directory mounted read-only into the FFmpeg container used for "
+        "preprocessing, so audio under it needs no per-call mounts "
+        "(default: working directory)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the on-disk transcript cache",
+    )
+    args = parser.parse_args()
+    workspace_dir = args.workspace
+    if args.no_cache:
+        transcript_cache = TranscriptCache(max_entries=0)
+
     mcp.run()